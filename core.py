@@ -0,0 +1,2136 @@
+# -*- coding: utf-8 -*-
+"""This file is part of the libsigrokdecode project.
+
+Copyright (C) 2018-2019 Libor Gabaj <libor.gabaj@gmail.com>
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, see <http://www.gnu.org/licenses/>.
+
+DESCRIPTION:
+The module contains the protocol logic of the decoder independent of the
+``sigrokdecode`` module, so that it can be used outside of libsigrokdecode
+as well, e.g., for live decoding of packets from a bus sniffer. The core
+takes packets of the ``i2c`` protocol decoder and outputs annotations,
+Python records, and binary data either to a callable or as results of
+generators.
+
+"""
+
+import datetime
+import struct
+import time
+from collections import namedtuple
+
+
+###############################################################################
+# Helper functions
+###############################################################################
+"""Functions equal to those of the module ``common.srdhelper`` of
+libsigrokdecode, so that the core does not depend on it.
+"""
+
+
+def bcd2int(b):
+    """Convert BCD coded byte to integer."""
+    return (b & 0x0F) + ((b >> 4) * 10)
+
+
+def format_data(data, radix):
+    """Format data value according to the radix option."""
+    formats = {
+        "Hex": "{:#04x}",
+        "Dec": "{:#d}",
+        "Oct": "{:#o}",
+        "Bin": "{:#010b}",
+    }
+    return formats.get(radix, "{}").format(data)
+
+
+def compose_annot(ann_label="", ann_value=None, ann_unit=None,
+                  ann_action=None):
+    """Compose list of annotation texts from labels, values, and actions.
+
+    - Each of arguments can be a list with items specific for particular
+      annotation text, the last item is reused for remaining texts.
+    """
+    if not isinstance(ann_label, list):
+        ann_label = [ann_label]
+    if not isinstance(ann_value, list):
+        ann_value = [ann_value]
+    if not isinstance(ann_action, list):
+        ann_action = [ann_action]
+    annots = []
+    for i in range(max(len(ann_label), len(ann_value), len(ann_action))):
+        label = ann_label[min(i, len(ann_label) - 1)]
+        value = ann_value[min(i, len(ann_value) - 1)]
+        action = ann_action[min(i, len(ann_action) - 1)]
+        text = label
+        if action is not None:
+            text = "{} {}".format(action, text)
+        if value is not None:
+            text = "{}: {}".format(text, value)
+        if ann_unit is not None:
+            text = "{} {}".format(text, ann_unit)
+        annots.append(text)
+    return annots
+
+
+###############################################################################
+# Enumeration classes for device parameters
+###############################################################################
+class Address:
+    """Enumeration of possible slave addresses."""
+
+    (SLAVE,) = (0x68,)
+
+
+class Register:
+    """Enumeration of possible slave register addresses."""
+
+    (
+        SECOND, MINUTE, HOUR, WEEKDAY, DAY, MONTH, YEAR,
+        CONTROL, NVRAM
+    ) = range(9)
+
+
+class ControlBits:
+    """Enumeration of bits in the control register."""
+
+    (RS0, RS1, SQWE, OUT) = (0, 1, 4, 7)
+
+
+class TimeBits:
+    """Enumeration of bits in the time keeping registers."""
+
+    (AMPM, MODE, CH) = (5, 6, 7)
+
+
+class NvRAM:
+    """Internal non-volatile memory address range of DS1307.
+
+    - Minimal and maximal position.
+    """
+
+    (MIN, MAX) = (0x08, 0x3f)
+
+
+class Params:
+    """Specific parameters."""
+
+    (UNIT_HZ, UNIT_KHZ) = ("Hz", "kHz")
+    (CACHE_SIZE,) = (4096,)    # Maximal number of cached annotations
+    (BITS_WINDOW,) = (8,)       # Number of bits in a byte packet
+    (DRIFT_PERIOD,) = (60,)     # Seconds rollovers per drift annotation
+    (EPOCH_ORDINAL,) = (datetime.date(1970, 1, 1).toordinal(),)
+    (SQW_WINDOW,) = (1.0,)      # Seconds of square wave measurement window
+    (SQW_TOLERANCE,) = (0.01,)  # Relative tolerance of square wave rate
+
+
+###############################################################################
+# Enumeration classes for outputs
+###############################################################################
+class State:
+    """Enumeration of states of the transmission state machine."""
+
+    (IDLE, ADDRESS, POINTER, DATA, FOREIGN) = range(5)
+
+
+class Output:
+    """Enumeration of output types used outside of libsigrokdecode."""
+
+    (ANN, PYTHON, BINARY) = range(3)
+
+
+class BinOut:
+    """Enumeration of binary output classes."""
+
+    (BURST, IMAGE) = range(2)
+
+
+###############################################################################
+# Enumeration classes for annotations
+###############################################################################
+class AnnAddrs:
+    """Enumeration of annotations for addresses."""
+
+    (SLAVE,) = (0,)
+
+
+class AnnRegs:
+    """Enumeration of annotations for registers."""
+
+    (
+        POINTER,
+        SECOND, MINUTE, HOUR, WEEKDAY, DAY, MONTH, YEAR,
+        CONTROL, NVRAM
+    ) = range(AnnAddrs.SLAVE + 1, (AnnAddrs.SLAVE + 1) + 10)
+
+
+class AnnBits:
+    """Enumeration of annotations for configuration bits."""
+
+    (
+        RESERVED, DATA,         # General bits
+        RS0, RS1, SQWE, OUT,    # From control register
+        AMPM, MODE, CH,         # From time keeping registers
+        SECOND, MINUTE, HOUR,
+        WEEKDAY, DAY, MONTH, YEAR,
+        NVRAM,
+    ) = range(AnnRegs.NVRAM + 1, (AnnRegs.NVRAM + 1) + 17)
+
+
+class AnnInfo:
+    """Enumeration of annotations for formatted info."""
+
+    (
+        WARN, BADADD, CHECK, WRITE, READ,
+        DATETIME, NVRAM, STATS, DRIFT, SUMMARY, SQW, TIMING,
+    ) = range(AnnBits.NVRAM + 1, (AnnBits.NVRAM + 1) + 12)
+
+
+###############################################################################
+# Parameters mapping
+###############################################################################
+weekdays = (
+    "Monday", "Tuesday", "Wednesday", "Thursday", "Friday",
+    "Saturday", "Sunday"
+)
+
+months = (
+    "Unknown",
+    "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December"
+)
+
+rates = {
+    0b00: 1,
+    0b01: 4096,
+    0b10: 8192,
+    0b11: 32768,
+}
+
+"""Formats of datetime for the decoder option.
+
+- Datetime parts are numbered in the format string equally to numbering
+  of time keeping registers.
+- Parts are passed as formatted strings, unknown ones as question marks.
+"""
+datetime_formats = {
+    "European": "{3} {4}.{5}.{6} {2}:{1}:{0}",
+    "American": "{3}, {5}/{4}/{6} {2}:{1}:{0}",
+    "ANSI": "{6}-{4}-{5}T{2}:{1}:{0}",
+}
+
+# Integer values of BCD coded bytes
+bcd_values = tuple(bcd2int(databyte) for databyte in range(256))
+
+# Two digit strings of integer values of BCD coded bytes
+two_digits = tuple("{:02d}".format(value) for value in range(256))
+
+# Month names indexed by BCD coded month, unknown for invalid months
+month_names = tuple(
+    months[value] if value < len(months) else months[0]
+    for value in bcd_values
+)
+
+
+def calendar_date(year, month, day):
+    """Return calendar values of the date.
+
+    Returns
+    -------
+    tuple
+        Days since Unix epoch, day of the year (1-366), and weekday index
+        (0 for Monday), or None for invalid date.
+
+    """
+    try:
+        date = datetime.date(year, month, day)
+    except ValueError:
+        return None
+    return (date.toordinal() - Params.EPOCH_ORDINAL,
+            date.timetuple().tm_yday, date.weekday())
+
+
+###############################################################################
+# Parameters anotations definitions
+###############################################################################
+addresses = {
+    AnnAddrs.SLAVE: ["Device address", "Address", "Add", "A"],
+}
+
+registers = {
+    AnnRegs.POINTER: ["Register pointer", "Pointer", "Ptr", "P"],
+    AnnRegs.SECOND: ["Seconds register", "Seconds", "Secs", "S"],
+    AnnRegs.MINUTE: ["Minutes register", "Minutes", "Mins", "M"],
+    AnnRegs.HOUR: ["Hours register", "Hours", "Hrs", "H"],
+    AnnRegs.WEEKDAY: ["Weekdays register", "Weekdays", "W"],
+    AnnRegs.DAY: ["Days register", "Days", "D"],
+    AnnRegs.MONTH: ["Months register", "Months", "Mons", "M"],
+    AnnRegs.YEAR: ["Years register", "Years", "Yrs", "Y"],
+    AnnRegs.CONTROL: ["Control register", "Control", "Ctrl", "C"],
+    AnnRegs.NVRAM: ["Non-volatile memory register", "NV-RAM", "NVR", "R"],
+}
+
+bits = {
+    AnnBits.RESERVED: ["Reserved", "Rsvd", "R"],
+    AnnBits.DATA: ["Data", "D"],
+    AnnBits.RS0: ["Rate select", "Rate", "RS"],
+    AnnBits.SQWE: ["SQW enable", "SQWE", "SE", "S"],
+    AnnBits.OUT: ["OUT", "O"],
+    AnnBits.AMPM: ["AM/PM", "A/P", "A"],
+    AnnBits.MODE: ["12/24 mode", "Mode", "M"],
+    AnnBits.CH: ["Clock halt", "CH", "H"],
+    AnnBits.SECOND: ["Second", "Sec", "S"],
+    AnnBits.MINUTE: ["Minute", "Min", "M"],
+    AnnBits.HOUR: ["Hour", "Hr", "H"],
+    AnnBits.WEEKDAY: ["Weekday", "WD", "W"],
+    AnnBits.DAY: ["Day", "D"],
+    AnnBits.MONTH: ["Month", "Mon", "M"],
+    AnnBits.YEAR: ["Year", "Yr", "Y"],
+    AnnBits.NVRAM: ["NVRAM", "RAM", "R"],
+}
+
+info = {
+    AnnInfo.WARN: ["Warnings", "Warn", "W"],
+    AnnInfo.BADADD: ["Uknown slave address", "Unknown address", "Uknown",
+                     "Unk", "U"],
+    AnnInfo.CHECK: ["Slave presence check", "Slave check", "Check",
+                    "Chk", "C"],
+    AnnInfo.WRITE: ["Write", "Wr", "W"],
+    AnnInfo.READ: ["Read", "Rd", "R"],
+    AnnInfo.DATETIME: ["Datetime", "Date", "D"],
+    AnnInfo.NVRAM: ["Memory", "Mem", "M"],
+    AnnInfo.STATS: ["Statistics", "Stats", "S"],
+    AnnInfo.DRIFT: ["RTC drift", "Drift", "D"],
+    AnnInfo.SUMMARY: ["Summary", "Sum", "S"],
+    AnnInfo.SQW: ["Square wave", "SQW", "Q"],
+    AnnInfo.TIMING: ["Bus timing", "Timing", "T"],
+}
+
+# Labels of all annotations indexed by annotation index
+labels = {**addresses, **registers, **bits, **info}
+
+
+###############################################################################
+# Decoder options and annotation rows
+###############################################################################
+decoder_options = (
+    {"id": "radix", "desc": "Number format", "default": "Hex",
+     "values": ("Hex", "Dec", "Oct", "Bin")},
+    {"id": "start_weekday", "desc": "The first day of the week",
+        "default": "Monday", "values": weekdays},
+    {"id": "date_format", "desc": "Date format",
+        "default": "European", "values": ("European", "American", "ANSI")},
+    {"id": "foreign", "desc": "Foreign slave traffic",
+        "default": "Annotate", "values": ("Annotate", "Summary", "Ignore")},
+    {"id": "nvram", "desc": "NVRAM access detail",
+        "default": "Block", "values": ("Block", "Bytes")},
+    {"id": "history", "desc": "Keep history of register changes",
+        "default": "no", "values": ("no", "yes")},
+    {"id": "changes", "desc": "Annotate changed values only",
+        "default": "no", "values": ("no", "yes")},
+    {"id": "stats", "desc": "Decoding statistics",
+        "default": "no", "values": ("no", "yes")},
+    {"id": "pointer", "desc": "Initial register pointer (-1 unknown)",
+        "default": -1},
+    {"id": "export", "desc": "File for export of register accesses (.npy)",
+        "default": ""},
+    {"id": "drift", "desc": "Estimate RTC drift against sample rate",
+        "default": "no", "values": ("no", "yes")},
+    {"id": "detail", "desc": "Annotation detail level",
+        "default": "Bits", "values": ("Bits", "Registers", "Transactions")},
+    {"id": "summary", "desc": "Summary period in seconds (0 none)",
+        "default": 0},
+    {"id": "addresses", "desc": "Hexadecimal slave addresses by comma",
+        "default": ""},
+    {"id": "timing", "desc": "Bus timing metrics",
+        "default": "no", "values": ("no", "yes")},
+)
+
+annotation_rows = (
+    ("bits", "Bits", tuple(range(AnnBits.RESERVED, AnnBits.NVRAM + 1))),
+    ("regs", "Registers", tuple(range(AnnAddrs.SLAVE, AnnRegs.NVRAM + 1))),
+    ("datetime", "Datetime",
+        (AnnInfo.DATETIME, AnnInfo.NVRAM, AnnInfo.READ)),
+    ("warnings", "Warnings", (AnnInfo.WARN, AnnInfo.BADADD)),
+    ("stats", "Statistics", (AnnInfo.STATS,)),
+    ("analysis", "Analysis", (AnnInfo.DRIFT, AnnInfo.SQW, AnnInfo.TIMING)),
+    ("summary", "Summary", (AnnInfo.SUMMARY,)),
+)
+
+
+###############################################################################
+# Decoder state
+###############################################################################
+"""Instance variables constituting the state of the decoding.
+
+- The state can be snapshot between any two packets and restored in another
+  decoder instance with the same options.
+- Byte sequences are serialized as hexadecimal strings, tuples and
+  dictionaries as lists, so that the snapshot is serializable by JSON.
+- State records of devices other than the current one are serialized as
+  lists of the slave address and the dictionary of device variables.
+"""
+state_variables = (
+    "ss", "es", "ssb", "ssd", "write", "state", "addr", "devices", "reg",
+    "second", "minute", "hour", "weekday", "day", "month", "year",
+    "bits", "databyte",
+    "shadow", "shadow_known", "dirty_min", "dirty_max", "shadow_history",
+    "xfer_reg", "xfer_data", "xfer_changed",
+    "nvram_reg", "nvram_ss", "nvram_es", "nvram_data",
+    "foreign_count", "foreign_ss", "foreign_es",
+    "last_datetime", "same_count", "same_ss", "same_es",
+    "drift_rtc", "drift_time", "drift_day", "drift_secs", "drift_fit",
+    "drift_ss", "drift_count",
+    "summary_ss", "summary_es", "summary_end", "summary_reads",
+    "summary_writes", "summary_first", "summary_last",
+    "sqw_rate", "sqw_ss", "sqw_last", "sqw_count", "sqw_mean", "sqw_m2",
+    "timing", "timing_addr", "timing_es",
+)
+state_bytes = ("shadow", "xfer_data", "nvram_data")
+
+"""Instance variables constituting the state of a device.
+
+- They are swapped in and out by a state record of a device at a switch
+  of the slave address, so that the decoding of each device is independent.
+"""
+device_variables = (
+    "reg",
+    "second", "minute", "hour", "weekday", "day", "month", "year",
+    "shadow", "shadow_known", "dirty_min", "dirty_max", "shadow_history",
+    "last_datetime", "same_count", "same_ss", "same_es",
+    "drift_rtc", "drift_time", "drift_day", "drift_secs", "drift_fit",
+    "drift_ss", "drift_count",
+)
+
+
+###############################################################################
+# Output records
+###############################################################################
+"""Result of the decoding generated outside of libsigrokdecode.
+
+- The 'output' is the output type from the enumeration class Output.
+"""
+Result = namedtuple("Result", "ss es output data")
+
+"""Record of a transaction put to the Python output.
+
+- It is put as the data of a command "READ" or "WRITE" spanning from the
+  start to the stop condition of the transmission.
+- The 'reg' is the register pointer at the start of the data transfer, the
+  'data' are bytes of the transfer.
+- The 'datetime' is a tuple of year, month, day, hour, minute, second, and
+  weekday index recently decoded, where unknown items are -1.
+- The 'epoch' is the datetime in seconds since Unix epoch and the 'yday' is
+  the day of the year, both -1 for unknown or invalid datetime. The RTC time
+  is taken as UTC.
+- The 'addr' is the slave address of the device.
+"""
+Transaction = namedtuple("Transaction",
+                         "ss es write reg data datetime epoch yday addr")
+
+
+###############################################################################
+# Register map definitions
+###############################################################################
+"""Map of slave registers.
+
+- Key is the address of a register, which definition is valid for all
+  following registers up to the next defined one.
+- Value is a tuple of the register annotation and a tuple of bit fields.
+- A bit field is a tuple of the annotation, LSB, MSB, and the name of
+  the decoder converter method. A field without converter is annotated bit by
+  bit.
+- The converter gets the field value and the entire data byte. It returns
+  annotation texts or None for omitting the field.
+- Fields are output in the order of definition.
+"""
+register_map = {
+    Register.SECOND: (AnnRegs.SECOND, (
+        (AnnBits.CH, TimeBits.CH, TimeBits.CH, "convert_halt"),
+        (AnnBits.SECOND, 0, TimeBits.CH - 1, "convert_second"),
+    )),
+    Register.MINUTE: (AnnRegs.MINUTE, (
+        (AnnBits.RESERVED, 7, 7, None),
+        (AnnBits.MINUTE, 0, 6, "convert_minute"),
+    )),
+    Register.HOUR: (AnnRegs.HOUR, (
+        (AnnBits.RESERVED, 7, 7, None),
+        (AnnBits.MODE, TimeBits.MODE, TimeBits.MODE, "convert_mode"),
+        (AnnBits.AMPM, TimeBits.AMPM, TimeBits.AMPM, "convert_ampm"),
+        (AnnBits.HOUR, 0, TimeBits.AMPM - 1, "convert_hour12"),
+        (AnnBits.HOUR, 0, TimeBits.MODE - 1, "convert_hour24"),
+    )),
+    Register.WEEKDAY: (AnnRegs.WEEKDAY, (
+        (AnnBits.RESERVED, 3, 7, None),
+        (AnnBits.WEEKDAY, 0, 2, "convert_weekday"),
+    )),
+    Register.DAY: (AnnRegs.DAY, (
+        (AnnBits.RESERVED, 6, 7, None),
+        (AnnBits.DAY, 0, 5, "convert_day"),
+    )),
+    Register.MONTH: (AnnRegs.MONTH, (
+        (AnnBits.RESERVED, 5, 7, None),
+        (AnnBits.MONTH, 0, 4, "convert_month"),
+    )),
+    Register.YEAR: (AnnRegs.YEAR, (
+        (AnnBits.YEAR, 0, 7, "convert_year"),
+    )),
+    Register.CONTROL: (AnnRegs.CONTROL, (
+        (AnnBits.RESERVED, 2, 3, None),
+        (AnnBits.RESERVED, 5, 6, None),
+        (AnnBits.OUT, ControlBits.OUT, ControlBits.OUT, "convert_out"),
+        (AnnBits.SQWE, ControlBits.SQWE, ControlBits.SQWE, "convert_sqwe"),
+        (AnnBits.RS0, ControlBits.RS0, ControlBits.RS1, "convert_rate"),
+    )),
+    Register.NVRAM: (AnnRegs.NVRAM, (
+        (AnnBits.NVRAM, 0, 7, "convert_nvram"),
+    )),
+}
+
+
+###############################################################################
+# Register values and validation
+###############################################################################
+def field_masks(fields):
+    """Return masks of bit fields of a register by their converter names.
+
+    - Masks of reserved fields without converter are merged under the name
+      None.
+    """
+    masks = {}
+    for ann, lsb, msb, fn in fields:
+        masks[fn] = masks.get(fn, 0) | ((1 << (msb - lsb + 1)) - 1) << lsb
+    return masks
+
+
+# Masks of bit fields indexed by register and converter name
+register_masks = {
+    reg: field_masks(fields) for reg, (reg_ann, fields) in register_map.items()
+}
+
+"""Validation rules of time keeping and control registers.
+
+- Key is the register address, value is a tuple of the register name, name
+  of the converter of the BCD coded value field, and the minimal and maximal
+  value. Masks of the value and reserved bits, which must be zero, are taken
+  from the register map.
+- Hours register has distinct rules for 12 and 24 hours mode.
+"""
+register_rules = {
+    Register.SECOND: ("seconds", "convert_second", 0, 59),
+    Register.MINUTE: ("minutes", "convert_minute", 0, 59),
+    Register.HOUR: ("hours", "convert_hour24", 0, 23),
+    Register.WEEKDAY: ("weekday", "convert_weekday", 1, 7),
+    Register.DAY: ("day", "convert_day", 1, 31),
+    Register.MONTH: ("month", "convert_month", 1, 12),
+    Register.YEAR: ("year", "convert_year", 0, 99),
+    Register.CONTROL: ("control", "convert_rate", 0, 3),
+}
+hours12_rule = ("hours", "convert_hour12", 1, 12)
+
+
+def register_rule(reg, databyte):
+    """Return validation rule of the register content."""
+    if reg == Register.HOUR and databyte >> TimeBits.MODE & 1:
+        return hours12_rule
+    return register_rules[reg]
+
+
+def register_value(reg, databyte):
+    """Return numeric value of the register content.
+
+    - Time keeping registers are decoded to seconds, minutes, hours in 24
+      hours mode, weekday number (1-7), day, month, and full year.
+    - Control register is decoded to square wave rate in Hz, 0 if disabled.
+    - NVRAM register is the data byte itself.
+    """
+    if reg == Register.CONTROL:
+        if databyte >> ControlBits.SQWE & 1:
+            mask = register_masks[reg]["convert_rate"]
+            return rates[(databyte & mask) >> ControlBits.RS0]
+        return 0
+    if reg not in register_rules:
+        return databyte
+    name, fn, minimum, maximum = register_rule(reg, databyte)
+    value = bcd_values[databyte & register_masks[reg][fn]]
+    if fn == "convert_hour12":
+        return value % 12 + 12 * (databyte >> TimeBits.AMPM & 1)
+    if reg == Register.YEAR:
+        return value + 2000
+    return value
+
+
+# Numeric values of registers indexed by register up to the first NVRAM one
+# and data byte
+register_values = tuple(
+    tuple(register_value(reg, databyte) for databyte in range(256))
+    for reg in range(Register.NVRAM + 1)
+)
+
+
+def register_error(reg, databyte):
+    """Return description of invalid register content, None for valid one."""
+    name, fn, minimum, maximum = register_rule(reg, databyte)
+    masks = register_masks[reg]
+    if databyte & masks.get(None, 0):
+        return "{} reserved bits set".format(name)
+    value = databyte & masks[fn]
+    if (value & 0x0f) > 9 or (value >> 4) > 9:
+        return "{} invalid BCD".format(name)
+    if not minimum <= bcd_values[value] <= maximum:
+        return "{} out of range".format(name)
+    return None
+
+
+# Descriptions of invalid register content indexed by register up to the
+# last non NVRAM one and data byte, None for valid content
+register_errors = tuple(
+    tuple(register_error(reg, databyte) for databyte in range(256))
+    for reg in range(Register.NVRAM)
+)
+
+
+###############################################################################
+# State machine definitions
+###############################################################################
+"""Map of transitions of the state machine.
+
+- Key is a state, value is a dictionary mapping a command of the packet
+  to the name of the decoder transition method, which gets the packet data
+  and sets the next state.
+- Commands without transition are ignored in the state.
+- Bits are not collected in the foreign transmission.
+"""
+transition_map = {
+    State.IDLE: {
+        "BITS": "on_bits",
+        "START": "on_start",
+    },
+    State.ADDRESS: {
+        "BITS": "on_bits",
+        "ADDRESS WRITE": "on_address_write",
+        "ADDRESS READ": "on_address_read",
+    },
+    State.POINTER: {
+        "BITS": "on_bits",
+        "DATA WRITE": "on_pointer",
+        "STOP": "on_nodata",
+    },
+    State.DATA: {
+        "BITS": "on_bits",
+        "DATA WRITE": "on_data",
+        "DATA READ": "on_data",
+        "START REPEAT": "on_restart",
+        "STOP": "on_stop",
+    },
+    State.FOREIGN: {
+        "START": "on_start",
+        "START REPEAT": "on_restart",
+        "STOP": "on_foreign_stop",
+    },
+}
+
+
+###############################################################################
+# Timing histogram
+###############################################################################
+class Histogram:
+    """Histogram of non-negative integer values in fixed logarithmic buckets.
+
+    - Values below 32 have exact buckets, each following octave is split
+      to 16 buckets, so that the relative error of a bucket is at most
+      6.25 % for any 64 bit value.
+    - The memory is fixed regardless of the number of values.
+    """
+
+    (SUB_BITS,) = (4,)   # Bits of buckets per octave
+    (BUCKETS,) = ((64 - SUB_BITS + 1) << SUB_BITS,)
+
+    def __init__(self):
+        """Create empty buckets."""
+        self.counts = [0] * self.BUCKETS
+        self.count = 0
+        self.total = 0
+        self.minimum = self.maximum = None
+
+    def add(self, value):
+        """Count the value to its bucket."""
+        shift = value.bit_length() - self.SUB_BITS - 1
+        if shift < 0:
+            shift = 0
+        self.counts[(shift << self.SUB_BITS) + (value >> shift)] += 1
+        self.count += 1
+        self.total += value
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+
+    def bucket_value(self, index):
+        """Return the middle value of the bucket."""
+        if index < 2 << self.SUB_BITS:
+            return index
+        shift = (index >> self.SUB_BITS) - 1
+        mantissa = (index & ((1 << self.SUB_BITS) - 1)) | 1 << self.SUB_BITS
+        return (mantissa << shift) + ((1 << shift) - 1) / 2
+
+    def percentile(self, percent):
+        """Return estimation of the percentile of counted values."""
+        if not self.count:
+            return None
+        rank = max(self.count * percent / 100, 1)
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                value = self.bucket_value(index)
+                return min(max(value, self.minimum), self.maximum)
+        return self.maximum
+
+    def summary(self):
+        """Return dictionary of summary statistics."""
+        return {
+            "count": self.count,
+            "min": self.minimum,
+            "max": self.maximum,
+            "mean": self.total / self.count if self.count else None,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+        }
+
+    def snapshot(self):
+        """Return serializable snapshot with counts of non-empty buckets."""
+        return [
+            self.count, self.total, self.minimum, self.maximum,
+            [[index, count] for index, count in enumerate(self.counts)
+             if count],
+        ]
+
+    def restore(self, snapshot):
+        """Restore the histogram from a snapshot."""
+        self.count, self.total, self.minimum, self.maximum, buckets = snapshot
+        self.counts = [0] * self.BUCKETS
+        for index, count in buckets:
+            self.counts[index] = count
+
+
+###############################################################################
+# Columnar export
+###############################################################################
+class ColumnWriter:
+    """Writer of register accesses to a file of NumPy structured array.
+
+    - The file is in the ``.npy`` format, so that it can be loaded by
+      ``numpy.load(path, mmap_mode="r")`` without copying.
+    - Records are packed to a preallocated buffer and written in chunks, so
+      that the memory does not grow with the number of records.
+    - The header with the shape of the array is rewritten at closing, its
+      length is reserved for any number of records.
+    """
+
+    descr = [
+        ("ss", "<u8"), ("es", "<u8"), ("reg", "u1"), ("byte", "u1"),
+        ("write", "u1"), ("value", "<i4"),
+    ]
+    record = struct.Struct("<QQBBBi")
+    (CHUNK, HEADER) = (65536, 256)  # Records per chunk, length of header
+
+    def __init__(self, path):
+        """Open the file and reserve its header."""
+        self.file = open(path, "wb")
+        self.buffer = bytearray(self.CHUNK * self.record.size)
+        self.count = 0
+        self.buffered = 0
+        self.write_header()
+
+    def write_header(self):
+        """Write header of the file with recent number of records."""
+        header = "{{'descr': {}, 'fortran_order': False, 'shape': ({},), }}" \
+            .format(self.descr, self.count)
+        prefix = b"\x93NUMPY\x01\x00"
+        length = self.HEADER - len(prefix) - 2
+        header = header.ljust(length - 1) + "\n"
+        self.file.write(prefix + struct.pack("<H", length) + header.encode())
+
+    def append(self, ss, es, reg, databyte, write):
+        """Append record of a register access."""
+        value = register_values[min(reg, Register.NVRAM)][databyte]
+        self.record.pack_into(self.buffer, self.buffered * self.record.size,
+                              ss, es, reg, databyte, write, value)
+        self.buffered += 1
+        if self.buffered == self.CHUNK:
+            self.flush()
+
+    def flush(self):
+        """Write buffered records to the file."""
+        self.file.write(
+            memoryview(self.buffer)[:self.buffered * self.record.size])
+        self.count += self.buffered
+        self.buffered = 0
+
+    def close(self):
+        """Write remaining records and update the header."""
+        self.flush()
+        self.file.seek(0)
+        self.write_header()
+        self.file.close()
+
+
+###############################################################################
+# Decoder core
+###############################################################################
+class Core:
+    """Protocol logic of real time clock chip ``DS1307``.
+
+    Arguments
+    ---------
+    options : dict
+        Decoder options overriding their default values.
+    put : callable
+        Receiver of outputs with arguments start sample, end sample, output,
+        and data. If none, outputs are collected in the list ``results``.
+
+    """
+
+    def __init__(self, options=None, put=None):
+        """Initialize decoder core."""
+        self.options = {opt["id"]: opt["default"] for opt in decoder_options}
+        self.options.update(options or {})
+        self.put = put or self.collect
+        self.results = []
+        self.samplerate = None
+        self.export = None
+        self.reset()
+
+    def reset(self):
+        """Reset decoder and initialize instance variables."""
+        self.close_export()
+        # Common parameters for I2C sampling
+        self.ss = 0         # Start sample
+        self.es = 0         # End sample
+        self.ssb = 0        # Start sample of an annotation transmission block
+        self.write = True   # Flag about recent write action (default write)
+        self.state = State.IDLE
+        # Specific parameters for a device
+        self.addr = Address.SLAVE
+        self.reg = -1
+        self.second = -1
+        self.minute = -1
+        self.hour = -1
+        self.weekday = -1
+        self.day = -1
+        self.month = -1
+        self.year = -1
+        # Shadow of device address space
+        self.shadow = bytearray(NvRAM.MAX + 1)
+        self.shadow_known = 0   # Bit mask of registers with known content
+        self.dirty_min = NvRAM.MAX + 1
+        self.dirty_max = -1
+        self.shadow_history = []
+        # Data transfer of a transmission
+        self.xfer_reg = -1
+        self.xfer_data = bytearray()
+        self.xfer_changed = False
+        # Window of bits of the recent byte reused for all bytes
+        self.bits = [[0, 0, 0]] * Params.BITS_WINDOW
+        self.clear_data()
+
+    def clear_data(self):
+        """Clear data cache."""
+        self.ssd = 0
+        self.databyte = None
+
+    def snapshot_state(self):
+        """Return serializable snapshot of the decoding state."""
+        return {name: self.pack_variable(name, getattr(self, name))
+                for name in state_variables}
+
+    def pack_variable(self, name, value):
+        """Return serializable value of a state variable."""
+        if name in state_bytes:
+            return value.hex()
+        if name == "foreign_count":
+            return sorted(value.items())
+        if name == "shadow_history":
+            return [[es, reg, data.hex()] for es, reg, data in value]
+        if name == "timing" and value is not None:
+            return {key: hist.snapshot() for key, hist in value.items()}
+        if name == "devices":
+            return [
+                [addr, {var: self.pack_variable(var, item)
+                        for var, item in zip(device_variables, record)}]
+                for addr, record in sorted(value.items())
+            ]
+        if isinstance(value, (tuple, list)):
+            return [list(item) if isinstance(item, list) else item
+                    for item in value]
+        return value
+
+    def unpack_variable(self, name, value):
+        """Return value of a state variable from its serialized value."""
+        if name in state_bytes:
+            return bytearray.fromhex(value)
+        if name == "foreign_count":
+            return dict(value)
+        if name == "last_datetime" and value is not None:
+            return tuple(value)
+        if name == "shadow_history":
+            return [(es, reg, bytes.fromhex(data)) for es, reg, data in value]
+        if name == "timing" and value is not None:
+            timing = {}
+            for key, snapshot in value.items():
+                timing[key] = Histogram()
+                timing[key].restore(snapshot)
+            return timing
+        if name == "devices":
+            return {
+                addr: [self.unpack_variable(var, record[var])
+                       for var in device_variables]
+                for addr, record in value
+            }
+        return value
+
+    def restore_state(self, state):
+        """Restore decoding state from a snapshot.
+
+        - Only variables present in the snapshot are restored, so that
+          the decoding can be started mid-stream e.g. from a known register
+          pointer by the snapshot {"reg": pointer}.
+        """
+        for name, value in state.items():
+            if name not in state_variables:
+                continue
+            if name == "bits":
+                self.bits[:] = value
+                continue
+            setattr(self, name, self.unpack_variable(name, value))
+
+    def restore_registers(self):
+        """Restore decoded time keeping values from the shadow of the device.
+
+        - Converters of registers with known content are applied without
+          output, e.g., after restoring the state with the shadow only.
+        """
+        for reg in range(Register.NVRAM):
+            if not self.shadow_known >> reg & 1:
+                continue
+            databyte = self.shadow[reg]
+            for ann, lsb, msb, values, fn in self.reg_map[reg][1]:
+                if fn is not None:
+                    fn(values[databyte], databyte)
+
+    def start(self, out_ann=Output.ANN, out_python=Output.PYTHON,
+              out_binary=Output.BINARY):
+        """Actions before the beginning of the decoding.
+
+        - Arguments are identifiers of outputs passed to the put callable.
+        """
+        self.out_ann = out_ann
+        self.out_python = out_python
+        self.out_binary = out_binary
+        self.radix = self.options["radix"]
+        self.radix_table = tuple(
+            format_data(databyte, self.radix) for databyte in range(256)
+        )
+        self.format_datetime = datetime_formats.get(
+            self.options["date_format"], "Unknown format").format
+        start_weekday_index = weekdays.index(self.options["start_weekday"])
+        self.weekday_table = tuple(
+            (start_weekday_index + bcd_values[value] - 1) % 7
+            for value in range(8)
+        )
+        self.annots_cache = {}
+        self.calendar_cache = {}
+        self.foreign = self.options["foreign"]
+        self.foreign_count = {}
+        self.foreign_ss = self.foreign_es = 0
+        self.nvram_block = self.options["nvram"] == "Block"
+        self.nvram_reg = 0
+        self.nvram_ss = self.nvram_es = 0
+        self.nvram_data = bytearray()
+        self.history = self.options["history"] == "yes"
+        self.changes_only = self.options["changes"] == "yes"
+        self.last_datetime = None
+        self.same_count = 0
+        self.same_ss = self.same_es = 0
+        self.drift = self.options["drift"] == "yes"
+        self.drift_rtc = None   # Recent RTC time in seconds
+        self.drift_time = 0.0   # Capture time of recent RTC time
+        self.drift_day = 0      # Seconds of unwrapped days
+        self.drift_secs = 0     # Recent RTC second of day
+        self.drift_fit = [0, 0.0, 0.0, 0.0, 0.0]
+        self.drift_ss = 0
+        self.drift_count = 0
+        self.ann_bits = self.options["detail"] == "Bits"
+        self.ann_regs = self.options["detail"] != "Transactions"
+        self.summary = max(self.options["summary"], 0)  # Period in seconds
+        self.timing = None
+        if self.options["timing"] == "yes":
+            self.timing = {
+                "transaction": Histogram(),
+                "byte": Histogram(),
+                "gap": Histogram(),
+            }
+        self.timing_addr = 0    # Number of address and pointer bytes
+        self.timing_es = -1     # End sample of recent transaction
+        self.sqw_rate = -1      # Programmed square wave rate, 0 disabled
+        self.sqw_ss = self.sqw_last = -1
+        self.sqw_count = 0      # Periods in the measurement window
+        self.sqw_mean = self.sqw_m2 = 0.0
+        self.summary_ss = self.summary_es = self.summary_end = 0
+        self.summary_reads = self.summary_writes = 0
+        self.summary_first = self.summary_last = None
+        self.close_export()
+        if self.options["export"]:
+            self.export = ColumnWriter(self.options["export"])
+        if self.options["pointer"] >= 0:
+            self.reg = self.options["pointer"] & NvRAM.MAX
+        self.stats = None
+        if self.options["stats"] == "yes":
+            self.instrument()
+        self.reg_map = self.compile_map(register_map)
+        self.transitions = self.compile_transitions(transition_map)
+        self.slaves = tuple(
+            int(addr, 16) for addr in self.options["addresses"].split(",")
+            if addr.strip()
+        ) or (Address.SLAVE,)
+        self.tag_device = len(self.slaves) > 1
+        self.addr = self.slaves[0]
+        self.devices = {}
+
+    def save_device(self):
+        """Return state record of the current device."""
+        return [getattr(self, name) for name in device_variables]
+
+    def initial_device(self):
+        """Return state record of a device decoded for the first time.
+
+        - The record is built anew, so that devices never share a shadow,
+          its history, or a drift fit.
+        """
+        pointer = self.options["pointer"]
+        return [
+            pointer & NvRAM.MAX if pointer >= 0 else -1,
+            -1, -1, -1, -1, -1, -1, -1,
+            bytearray(NvRAM.MAX + 1), 0, NvRAM.MAX + 1, -1, [],
+            None, 0, 0, 0,
+            None, 0.0, 0, 0, [0, 0.0, 0.0, 0.0, 0.0],
+            0, 0,
+        ]
+
+    def switch_device(self, addr):
+        """Swap state of the current device for the device at the address.
+
+        - Span of identical reads of a device is kept open over the switch,
+          so that polling of more devices is folded per device.
+        - A device decoded for the first time starts with the initial state.
+        """
+        self.devices[self.addr] = self.save_device()
+        record = self.devices.pop(addr, None)
+        if record is None:
+            record = self.initial_device()
+        for name, value in zip(device_variables, record):
+            setattr(self, name, value)
+        self.addr = addr
+
+    def device_tag(self, val):
+        """Prefix the annotation value by the slave address of the device.
+
+        - The value is tagged only if more devices are decoded.
+        """
+        if not self.tag_device:
+            return val
+        return "[{}] {}".format(self.radix_table[self.addr], val)
+
+    def instrument(self):
+        """Replace methods of the instance by counting and timing wrappers.
+
+        - It is done only if statistics are required, so that the decoding
+          without them is not burdened at all.
+        - Handlers, converters, and outputs are wrapped by counters of calls
+          and their inclusive time in seconds.
+        - Packets are counted per command, bytes per register, and
+          annotations per annotation row, while annotations without a row
+          are counted under the key "other".
+        - A transaction is counted as partial, if it is abandoned by a start
+          before its stop, by a repeated start before a register access, or
+          if it is still open at the end of the decoding.
+        """
+        self.stats = {
+            "commands": {},
+            "registers": {},
+            "rows": {},
+            "foreign": 0,
+            "partial": 0,
+            "calls": {},
+        }
+        calls = self.stats["calls"]
+        timer = time.perf_counter
+
+        def timed(name, fn):
+            counter = calls[name] = [0, 0.0]
+
+            def wrapper(*args):
+                start = timer()
+                try:
+                    return fn(*args)
+                finally:
+                    counter[0] += 1
+                    counter[1] += timer() - start
+            return wrapper
+
+        for name in dir(self):
+            if name.startswith(("handle_", "convert_", "output_")) \
+                    and name != "output_stats":
+                setattr(self, name, timed(name, getattr(self, name)))
+        # Packets per command
+        commands = self.stats["commands"]
+        decode = self.decode
+        abandoned = {
+            "START": (State.ADDRESS, State.POINTER, State.DATA),
+            "START REPEAT": (State.ADDRESS, State.POINTER),
+        }
+
+        def decode_counted(ss, es, data):
+            cmd = data[0]
+            commands[cmd] = commands.get(cmd, 0) + 1
+            if self.state in abandoned.get(cmd, ()):
+                self.stats["partial"] += 1
+            decode(ss, es, data)
+        self.decode = timed("decode", decode_counted)
+        # Bytes per register
+        registers = self.stats["registers"]
+        update_shadow = self.update_shadow
+
+        def update_shadow_counted(databyte):
+            registers[self.reg] = registers.get(self.reg, 0) + 1
+            return update_shadow(databyte)
+        self.update_shadow = update_shadow_counted
+        # Foreign transmissions
+        check_addr = self.check_addr
+
+        def check_addr_counted(addr_slave):
+            result = check_addr(addr_slave)
+            self.stats["foreign"] += not result
+            return result
+        self.check_addr = check_addr_counted
+        # Annotations per row
+        rows = self.stats["rows"]
+        ann_rows = {}
+        for row_id, _, anns in annotation_rows:
+            rows[row_id] = 0
+            ann_rows.update(dict.fromkeys(anns, row_id))
+        put = self.put
+
+        def put_counted(ss, es, output, data):
+            if output == self.out_ann:
+                row_id = ann_rows.get(data[0], "other")
+                rows[row_id] = rows.get(row_id, 0) + 1
+            put(ss, es, output, data)
+        self.put = put_counted
+
+    def output_stats(self):
+        """Output statistics as annotation and to the Python output."""
+        if self.stats is None:
+            return
+        if self.state in (State.ADDRESS, State.POINTER, State.DATA):
+            self.stats["partial"] += 1
+        calls = self.stats["calls"]
+        val = "{} packets, {} transactions, {} partial, {} checks, " \
+            "{} foreign, {} bytes, {} annotations, {:.3f} s".format(
+                sum(self.stats["commands"].values()),
+                calls["handle_stop"][0],
+                self.stats["partial"],
+                calls["handle_nodata"][0],
+                self.stats["foreign"],
+                sum(self.stats["registers"].values()),
+                sum(self.stats["rows"].values()),
+                calls["decode"][1],
+            )
+        ann = AnnInfo.STATS
+        annots = compose_annot(info[ann], ann_value=val)
+        self.put(0, self.es, self.out_ann, [ann, annots])
+        self.put(0, self.es, self.out_python, ["STATS", self.stats])
+
+    def compile_map(self, regmap):
+        """Compile register map to the list indexed by register address.
+
+        - Bit fields are compiled to tuples (annotation, LSB, MSB, table of
+          field values indexed by data byte, bound converter method).
+        """
+        compiled = []
+        reg_def = None
+        for reg in range(NvRAM.MAX + 1):
+            if reg in regmap:
+                reg_ann, fields = regmap[reg]
+                reg_def = (reg_ann, tuple(
+                    (ann, lsb, msb,
+                     tuple(databyte >> lsb & ((1 << (msb - lsb + 1)) - 1)
+                           for databyte in range(256)),
+                     fn and getattr(self, fn))
+                    for ann, lsb, msb, fn in fields
+                ))
+            compiled.append(reg_def)
+        return compiled
+
+    def compose_annot(self, ann, ann_value=None, ann_unit=None,
+                      ann_action=False, ann_radix=False):
+        """Compose annotation texts or take them from the cache.
+
+        Arguments
+        ---------
+        ann : integer
+            Index of the annotation in the annotations list `labels`.
+        ann_value : integer, string, tuple
+            Value of the annotation. Tuple is used for values specific for
+            each annotation label.
+        ann_unit : string
+            Unit of the annotation value.
+        ann_action : boolean
+            Flag about prefixing annotation with recent r/w action.
+        ann_radix : boolean
+            Flag about formatting the integer value according to the radix
+            decoder option.
+
+        Returns
+        -------
+        list
+            Shared list of annotation texts, which must not be modified.
+
+        """
+        key = (ann, ann_value, ann_unit,
+               self.write if ann_action else None,
+               ann_radix and self.radix)
+        annots = self.annots_cache.get(key)
+        if annots is None:
+            if len(self.annots_cache) >= Params.CACHE_SIZE:
+                self.annots_cache.clear()
+            val = ann_value
+            if ann_radix:
+                val = self.radix_table[val]
+            elif isinstance(val, tuple):
+                val = list(val)
+            act = self.format_rw() if ann_action else None
+            annots = compose_annot(labels[ann], ann_value=val,
+                                   ann_unit=ann_unit, ann_action=act)
+            self.annots_cache[key] = annots
+        return annots
+
+    def putd(self, sb, eb, data):
+        """Span data output across bit range.
+
+        - Because bits are order with MSB first, the output is an annotation
+          block from the last sample of the start bit (sb) to the first sample
+          of the end bit (eb).
+        - The higher bit the lower sample number.
+        """
+        self.put(self.bits[eb][1], self.bits[sb][2], self.out_ann, data)
+        # self.put(self.bits[ss][1], self.bits[es][2], self.out_ann, data)
+
+    def putb(self, sb, eb=None, ann=AnnBits.RESERVED):
+        """Span special bit annotation across bit range bit by bit.
+
+        Arguments
+        ---------
+        sb : integer
+            Number of the annotated start bit counting from 0.
+        eb : integer
+            Number of the end bit right after the last annotated bit
+            counting from 0. If none value is provided, the method uses
+            start value increased by 1, so that just the first bit will be
+            annotated.
+        ann : integer
+            Index of the special bit's annotation in the annotations list
+            `bits`. Default value is for reserved bit.
+
+        """
+        annots = self.compose_annot(ann)
+        for bit in range(sb, eb or (sb + 1)):
+            self.put(self.bits[bit][1], self.bits[bit][2],
+                     self.out_ann, [ann, annots])
+
+    def collect(self, ss, es, output, data):
+        """Collect output to the list of results."""
+        self.results.append(Result(ss, es, output, data))
+
+    def feed(self, ss, es, data):
+        """Decode a packet and return list of results."""
+        self.decode(ss, es, data)
+        return self.feed_results()
+
+    def stream(self, packets):
+        """Decode packets and generate results.
+
+        - Packets are tuples (ss, es, [cmd, data]) of the i2c decoder.
+        - Results of the end of decoding are generated after the last packet.
+        """
+        decode = self.decode
+        for ss, es, data in packets:
+            decode(ss, es, data)
+            if self.results:
+                yield from self.feed_results()
+        self.end()
+        yield from self.feed_results()
+
+    async def astream(self, packets):
+        """Decode packets from an asynchronous iterator and generate results.
+
+        - Next packet is awaited only after all results of the previous one
+          have been consumed, so that a slow consumer applies backpressure
+          to the source of packets.
+        """
+        decode = self.decode
+        async for ss, es, data in packets:
+            decode(ss, es, data)
+            if self.results:
+                for result in self.feed_results():
+                    yield result
+        self.end()
+        for result in self.feed_results():
+            yield result
+
+    def feed_results(self):
+        """Return collected results and start collecting new ones."""
+        results = self.results
+        self.results = []
+        return results
+
+    def end(self):
+        """Actions after the end of the decoding.
+
+        - Pending outputs of every decoded device are output in the state of
+          that device, the recent device being the last one.
+        """
+        self.output_foreign()
+        for addr in sorted(self.devices) + [self.addr]:
+            if addr != self.addr:
+                self.switch_device(addr)
+            self.output_same()
+            if self.drift and self.drift_count:
+                self.output_drift()
+        self.output_stats()
+        self.output_summary()
+        self.output_sqw()
+        self.output_timing()
+        self.close_export()
+
+    def close_export(self):
+        """Close pending export of register accesses."""
+        if self.export:
+            self.export.close()
+            self.export = None
+
+    def check_addr(self, addr_slave):
+        """Check correct slave address.
+
+        - A foreign address is annotated, counted for the summary, or ignored
+          according to the decoder option.
+        - A device address different from the recent one switches the state
+          of the decoded device.
+        """
+        if addr_slave in self.slaves:
+            if addr_slave != self.addr:
+                self.switch_device(addr_slave)
+            return True
+        if self.foreign == "Annotate":
+            ann = AnnInfo.BADADD
+            annots = self.compose_annot(ann, ann_value=addr_slave,
+                                        ann_radix=True)
+            self.put(self.ss, self.es, self.out_ann, [ann, annots])
+        elif self.foreign == "Summary":
+            if not self.foreign_count:
+                self.foreign_ss = self.ssb
+            self.foreign_count[addr_slave] = \
+                self.foreign_count.get(addr_slave, 0) + 1
+        return False
+
+    def output_foreign(self):
+        """Output summary of transmissions to foreign slave addresses."""
+        if not self.foreign_count:
+            return
+        val = ", ".join(
+            "{} ({}x)".format(self.radix_table[addr], count)
+            for addr, count in sorted(self.foreign_count.items())
+        )
+        ann = AnnInfo.BADADD
+        annots = compose_annot(info[ann], ann_value=val)
+        self.put(self.foreign_ss, self.foreign_es, self.out_ann, [ann, annots])
+        self.foreign_count = {}
+
+    def collect_data(self, databyte):
+        """Collect data byte to a data cache."""
+        self.ssd = self.ss
+        self.databyte = databyte
+
+    def format_rw(self):
+        """Format read/write action."""
+        act = (AnnInfo.READ, AnnInfo.WRITE)[self.write]
+        return info[act]
+
+    def output_datetime(self):
+        """Format datetime string and prefix it by recent r/w operation.
+
+        - Applied decoder options for the starting weekday and date format.
+        - Unknown parts of the datetime are formatted as question marks.
+        - Texts are composed without the cache, because the datetime is
+          mostly unique.
+        - Invalid date and weekday are warned about only if the transfer
+          included them, so that the warning is not repeated.
+        """
+        second, minute, hour, day, month = (
+            two_digits[value] if value >= 0 else "??"
+            for value in (self.second, self.minute, self.hour,
+                          self.day, self.month)
+        )
+        dt_str = self.format_datetime(
+            second, minute, hour,
+            weekdays[self.weekday] if self.weekday >= 0 else "?",
+            day, month,
+            "{:04d}".format(self.year) if self.year >= 0 else "????",
+        )
+        # Info row
+        ann = AnnInfo.DATETIME
+        val = self.device_tag(dt_str)
+        annots = compose_annot(info[ann], ann_value=val,
+                               ann_action=self.format_rw())
+        self.put(self.ssb, self.es, self.out_ann, [ann, annots])
+        # Warnings row
+        cal = self.calendar()
+        if cal is None:
+            if min(self.year, self.month, self.day) < 0 \
+                    or not self.xfer_includes(Register.DAY, Register.YEAR):
+                return
+            val = "invalid date"
+        elif self.weekday >= 0 and self.weekday != cal[2] \
+                and self.xfer_includes(Register.WEEKDAY, Register.YEAR):
+            val = "weekday {} instead of {}".format(
+                weekdays[self.weekday], weekdays[cal[2]])
+        else:
+            return
+        ann = AnnInfo.WARN
+        annots = compose_annot(info[ann], ann_value=self.device_tag(val))
+        self.put(self.ssb, self.es, self.out_ann, [ann, annots])
+
+    def xfer_includes(self, first, last):
+        """Return flag about registers of the range in the recent transfer."""
+        if self.xfer_reg < 0:
+            return False
+        count = len(self.xfer_data)
+        return any((reg - self.xfer_reg) % (NvRAM.MAX + 1) < count
+                   for reg in range(first, last + 1))
+
+    def calendar(self):
+        """Return calendar values of the recent date from the cache.
+
+        - Values are computed once per date by ``calendar_date``.
+        """
+        key = (self.year, self.month, self.day)
+        if key in self.calendar_cache:
+            return self.calendar_cache[key]
+        if len(self.calendar_cache) >= Params.CACHE_SIZE:
+            self.calendar_cache.clear()
+        cal = self.calendar_cache[key] = calendar_date(*key)
+        return cal
+
+    def epoch(self):
+        """Return recent datetime in seconds since Unix epoch and day of year.
+
+        - Both values are -1 for unknown or invalid datetime.
+        """
+        cal = self.calendar()
+        if cal is None or min(self.second, self.minute, self.hour) < 0:
+            return -1, -1
+        return (cal[0] * 86400 + (self.hour * 60 + self.minute) * 60
+                + self.second), cal[1]
+
+    def output_transaction(self):
+        """Put record of the recent data transfer to the Python output."""
+        cmd = ("READ", "WRITE")[self.write]
+        record = Transaction(
+            self.ssb, self.es, self.write, self.xfer_reg,
+            bytes(self.xfer_data),
+            (self.year, self.month, self.day,
+             self.hour, self.minute, self.second, self.weekday),
+            *self.epoch(), self.addr
+        )
+        self.put(self.ssb, self.es, self.out_python, [cmd, record])
+
+    def output_binary(self):
+        """Put data burst and device image of the transmission to binary.
+
+        - The data burst is prefixed by the register offset (1 byte, 0xff for
+          unknown register pointer) and the number of data bytes (2 bytes,
+          little endian).
+        - The device image is the entire shadow of the device address space.
+        """
+        if self.xfer_data:
+            count = len(self.xfer_data)
+            burst = bytes((self.xfer_reg & 0xff, count & 0xff, count >> 8))
+            self.put(self.ssb, self.es, self.out_binary,
+                     [BinOut.BURST, burst + self.xfer_data])
+        self.put(self.ssb, self.es, self.out_binary,
+                 [BinOut.IMAGE, bytes(self.shadow)])
+
+    def handle_stop(self):
+        """Process end of a transmission with register access.
+
+        - In the mode of changes only an unchanged read is folded to the
+          span of identical reads and the datetime is output only if changed.
+        - The span of identical reads is output before any other output of
+          a changed transaction, so that outputs keep the order of samples.
+        """
+        if self.changes_only and (self.xfer_changed or self.write):
+            self.output_same()
+        self.output_nvram()
+        if not self.changes_only:
+            self.output_datetime()
+        elif self.xfer_changed or self.write:
+            dt = (self.year, self.month, self.day,
+                  self.hour, self.minute, self.second, self.weekday)
+            if dt != self.last_datetime:
+                self.last_datetime = dt
+                self.output_datetime()
+        else:
+            if not self.same_count:
+                self.same_ss = self.ssb
+            self.same_count += 1
+            self.same_es = self.es
+        if self.drift:
+            self.track_drift()
+        if self.summary and self.samplerate:
+            self.count_summary()
+        if self.timing is not None:
+            self.track_timing()
+        self.output_transaction()
+        self.output_binary()
+        self.commit_shadow()
+        self.xfer_changed = False
+
+    def track_drift(self):
+        """Update estimation of RTC drift by the transaction.
+
+        - Capture time of a rollover of the seconds register is estimated as
+          the middle between two reads with different RTC time.
+        - RTC time of rollovers against their capture time is fitted by
+          the running least squares line, which slope deviation from 1 is
+          the drift.
+        - Writing seconds register restarts the estimation.
+        """
+        count = len(self.xfer_data)
+        offset = (Register.SECOND - self.xfer_reg) % (NvRAM.MAX + 1)
+        if not count or not self.samplerate or self.xfer_reg < 0 \
+                or offset >= count:
+            return
+        if self.write:
+            self.drift_rtc = None
+            self.drift_fit = [0, 0.0, 0.0, 0.0, 0.0]
+            return
+        if min(self.second, self.minute, self.hour) < 0:
+            return
+        secs = (self.hour * 60 + self.minute) * 60 + self.second
+        if secs < self.drift_secs - 43200:
+            self.drift_day += 86400
+        self.drift_secs = secs
+        rtc = self.drift_day + secs
+        time_now = (self.ssb + self.es) / 2 / self.samplerate
+        if self.drift_rtc is not None and rtc != self.drift_rtc:
+            x = (self.drift_time + time_now) / 2
+            fit = self.drift_fit
+            fit[0] += 1
+            dx = x - fit[1]
+            fit[1] += dx / fit[0]
+            fit[2] += (rtc - fit[2]) / fit[0]
+            fit[3] += dx * (rtc - fit[2])
+            fit[4] += dx * (x - fit[1])
+            self.drift_count += 1
+            if self.drift_count >= Params.DRIFT_PERIOD:
+                self.output_drift()
+        self.drift_rtc = rtc
+        self.drift_time = time_now
+
+    def output_drift(self):
+        """Output recent drift estimation in ppm.
+
+        - It is output as annotation and to the Python output.
+        """
+        count, _, _, cxy, sxx = self.drift_fit
+        if count < 2 or not sxx:
+            return
+        ppm = (cxy / sxx - 1) * 1e6
+        val = self.device_tag(
+            "{:+.2f} ppm ({} rollovers)".format(ppm, count))
+        ann = AnnInfo.DRIFT
+        annots = compose_annot(info[ann], ann_value=val)
+        self.put(self.drift_ss, self.es, self.out_ann, [ann, annots])
+        self.put(self.drift_ss, self.es, self.out_python,
+                 ["DRIFT", {"ppm": ppm, "rollovers": count,
+                            "addr": self.addr}])
+        self.drift_ss = self.es
+        self.drift_count = 0
+
+    def count_summary(self):
+        """Count the transaction to the summary of its period.
+
+        - Periods are aligned to multiples of the summary period from the
+          beginning of the capture, periods without transactions are omitted.
+        """
+        if self.ssb >= self.summary_end:
+            self.output_summary()
+            period = max(int(self.summary * self.samplerate), 1)
+            self.summary_end = (self.ssb // period + 1) * period
+            self.summary_ss = self.ssb
+        if self.write:
+            self.summary_writes += 1
+        else:
+            self.summary_reads += 1
+        self.summary_es = self.es
+        if min(self.second, self.minute, self.hour) >= 0:
+            self.summary_last = (self.hour, self.minute, self.second)
+            if self.summary_first is None:
+                self.summary_first = self.summary_last
+
+    def output_summary(self):
+        """Output summary of transactions in the recent period."""
+        if not (self.summary_reads or self.summary_writes):
+            return
+        val = "{} reads, {} writes".format(self.summary_reads,
+                                           self.summary_writes)
+        if self.summary_first is not None:
+            val += ", time {:02d}:{:02d}:{:02d}-{:02d}:{:02d}:{:02d}".format(
+                *(self.summary_first + self.summary_last))
+        ann = AnnInfo.SUMMARY
+        annots = compose_annot(info[ann], ann_value=val)
+        self.put(self.summary_ss, self.summary_es, self.out_ann, [ann, annots])
+        self.summary_reads = self.summary_writes = 0
+        self.summary_first = self.summary_last = None
+
+    def sqw_edge(self, sample):
+        """Measure square wave by its rising edge.
+
+        - The output SQW/OUT is measured by rising edges only, so that
+          the cost is proportional to the number of edges instead of samples.
+        - Periods are accumulated to the window of at least the measurement
+          window length and two periods, which is then output.
+        """
+        if not self.samplerate:
+            return
+        if self.sqw_ss < 0:
+            self.sqw_ss = self.sqw_last = sample
+            return
+        period = sample - self.sqw_last
+        self.sqw_last = sample
+        self.sqw_count += 1
+        delta = period - self.sqw_mean
+        self.sqw_mean += delta / self.sqw_count
+        self.sqw_m2 += delta * (period - self.sqw_mean)
+        window = Params.SQW_WINDOW * self.samplerate
+        if self.sqw_count >= 2 and sample - self.sqw_ss >= window:
+            self.output_sqw()
+
+    def output_sqw(self):
+        """Output frequency and jitter of the square wave in the window.
+
+        - The frequency is compared with the recently programmed rate
+          and a mismatch is warned about.
+        """
+        if self.sqw_count < 2:
+            return
+        freq = self.sqw_count * self.samplerate / (self.sqw_last - self.sqw_ss)
+        jitter = (self.sqw_m2 / self.sqw_count) ** 0.5 / self.samplerate
+        val = "{:.1f} {}, jitter {:.2f} us".format(freq, Params.UNIT_HZ,
+                                                   jitter * 1e6)
+        ann = AnnInfo.SQW
+        annots = compose_annot(info[ann], ann_value=val)
+        self.put(self.sqw_ss, self.sqw_last, self.out_ann, [ann, annots])
+        self.put(self.sqw_ss, self.sqw_last, self.out_python,
+                 ["SQW", {"freq": freq, "jitter": jitter,
+                          "rate": self.sqw_rate}])
+        if self.sqw_rate >= 0 \
+                and abs(freq - self.sqw_rate) > freq * Params.SQW_TOLERANCE:
+            val = "square wave {:.1f} {} instead of {}".format(
+                freq, Params.UNIT_HZ,
+                "{} {}".format(self.sqw_rate, Params.UNIT_HZ)
+                if self.sqw_rate else "disabled")
+            ann = AnnInfo.WARN
+            annots = compose_annot(info[ann], ann_value=val)
+            self.put(self.sqw_ss, self.sqw_last, self.out_ann, [ann, annots])
+        self.sqw_ss = self.sqw_last
+        self.sqw_count = 0
+        self.sqw_mean = self.sqw_m2 = 0.0
+
+    def output_same(self):
+        """Output span of identical reads."""
+        if not self.same_count:
+            return
+        ann = AnnInfo.READ
+        val = self.device_tag("{} identical".format(self.same_count))
+        annots = compose_annot(info[ann], ann_value=val)
+        self.put(self.same_ss, self.same_es, self.out_ann, [ann, annots])
+        self.same_count = 0
+
+    def handle_address(self):
+        """Process slave address."""
+        if self.databyte is None:
+            return
+        # Registers row
+        if self.ann_regs:
+            ann = AnnAddrs.SLAVE
+            if self.tag_device:
+                annots = self.compose_annot(ann, ann_value=self.addr,
+                                            ann_radix=True)
+            else:
+                annots = self.compose_annot(ann)
+            self.put(self.ssd, self.es, self.out_ann, [ann, annots])
+        self.timing_addr += 1
+        self.xfer_reg = self.reg
+        self.xfer_data = bytearray()
+        self.clear_data()
+
+    def handle_pointer(self):
+        """Process register pointer."""
+        self.xfer_reg = self.reg
+        self.timing_addr += 1
+        # Registers row
+        if self.ann_regs:
+            ann = AnnRegs.POINTER
+            annots = self.compose_annot(ann, ann_value=self.reg,
+                                        ann_action=True, ann_radix=True)
+            self.put(self.ssd, self.es, self.out_ann, [ann, annots])
+        self.clear_data()
+
+    def handle_nodata(self):
+        """Process transmission without any data."""
+        # Info row
+        ann = AnnInfo.CHECK
+        annots = self.compose_annot(ann)
+        self.put(self.ssb, self.es, self.out_ann, [ann, annots])
+        if self.timing is not None:
+            self.track_timing()
+
+    def track_timing(self):
+        """Count duration of the transaction and the gap before it.
+
+        - The gap is measured from the end of the recent transaction of
+          a decoded device to the start of the current one.
+        """
+        self.timing["transaction"].add(self.es - self.ssb)
+        if self.timing_es >= 0:
+            self.timing["gap"].add(max(self.ssb - self.timing_es, 0))
+        self.timing_es = self.es
+
+    def output_timing(self):
+        """Output summary of timing metrics.
+
+        - It is output as annotation and to the Python output.
+        - Times are in microseconds if the sample rate is known, otherwise in
+          samples.
+        """
+        if self.timing is None or not self.timing["transaction"].count:
+            return
+        if self.samplerate:
+            scale, unit = 1e6 / self.samplerate, "us"
+        else:
+            scale, unit = 1, "samples"
+        summaries = {
+            name: hist.summary() for name, hist in self.timing.items()
+        }
+        data_bytes = summaries["byte"]["count"]
+        texts = []
+        for name, summary in summaries.items():
+            if not summary["count"]:
+                continue
+            texts.append("{} p50/p90/p99 {:.1f}/{:.1f}/{:.1f} {}".format(
+                name, summary["p50"] * scale, summary["p90"] * scale,
+                summary["p99"] * scale, unit))
+        texts.append("address/data {}/{}".format(self.timing_addr,
+                                                 data_bytes))
+        ann = AnnInfo.TIMING
+        annots = compose_annot(info[ann], ann_value=", ".join(texts))
+        self.put(0, self.es, self.out_ann, [ann, annots])
+        summaries["address_bytes"] = self.timing_addr
+        summaries["data_bytes"] = data_bytes
+        summaries["address_ratio"] = \
+            self.timing_addr / data_bytes if data_bytes else None
+        summaries["unit"] = unit
+        summaries["scale"] = scale
+        self.put(0, self.es, self.out_python, ["TIMING", summaries])
+
+    def handle_reg(self):
+        """Process slave register by its compiled definition.
+
+        - Honor auto increment of the register at reading.
+        - When the address reaches maximal nvram position, it will wrap around
+          to address 0.
+        - Content of time keeping and control registers is validated by
+          a lookup to the table of errors.
+        - Data with unknown register pointer are just warned about.
+        """
+        databyte = self.databyte
+        self.xfer_data.append(databyte)
+        if self.timing is not None:
+            self.timing["byte"].add(self.es - self.ssd)
+        if self.reg < Register.NVRAM:
+            if self.reg < 0:
+                self.output_warning("unknown register pointer")
+                self.clear_data()
+                return
+            error = register_errors[self.reg][databyte]
+            if error is not None:
+                self.output_warning(error)
+        if self.export:
+            self.export.append(self.ssd, self.es, self.reg, databyte,
+                               self.write)
+        changed = self.update_shadow(databyte)
+        self.xfer_changed |= changed
+        if changed and self.same_count:
+            self.output_same()
+        if self.changes_only and not changed:
+            # Unchanged register breaks NVRAM burst
+            self.output_nvram()
+        elif self.reg >= NvRAM.MIN and self.nvram_block:
+            self.collect_nvram(databyte)
+        else:
+            self.output_nvram()
+            self.output_reg(databyte)
+        self.reg += 1   # Address auto increment
+        if self.reg > NvRAM.MAX:    # Address rollover
+            self.reg = 0
+        self.clear_data()
+
+    def output_warning(self, val):
+        """Output warning about the recent data byte."""
+        ann = AnnInfo.WARN
+        annots = compose_annot(info[ann], ann_value=self.device_tag(val))
+        self.put(self.ssd, self.es, self.out_ann, [ann, annots])
+
+    def update_shadow(self, databyte):
+        """Update shadow of the current register and extend dirty range.
+
+        Returns
+        -------
+        boolean
+            Flag about changed or previously unknown register content.
+
+        """
+        reg = self.reg
+        changed = self.shadow[reg] != databyte \
+            or not self.shadow_known >> reg & 1
+        self.shadow[reg] = databyte
+        self.shadow_known |= 1 << reg
+        if reg < self.dirty_min:
+            self.dirty_min = reg
+        if reg > self.dirty_max:
+            self.dirty_max = reg
+        return changed
+
+    def commit_shadow(self):
+        """Finish shadow updates of a transmission.
+
+        - Dirty range is stored to the history as a tuple of the end sample
+          of the transmission, the start register and the content of the range
+          if the history is enabled.
+        - Dirty range is reset.
+        """
+        if self.dirty_max < 0:
+            return
+        if self.history:
+            self.shadow_history.append((
+                self.es, self.dirty_min,
+                bytes(self.shadow[self.dirty_min:self.dirty_max + 1])
+            ))
+        self.dirty_min = NvRAM.MAX + 1
+        self.dirty_max = -1
+
+    def shadow_snapshot(self):
+        """Return recent content of the device and mask of known registers."""
+        return bytes(self.shadow), self.shadow_known
+
+    def shadow_at(self, sample):
+        """Return content of the device at the sample from the history.
+
+        - Registers not changed until the sample are zero.
+        """
+        image = bytearray(NvRAM.MAX + 1)
+        for es, reg, data in self.shadow_history:
+            if es > sample:
+                break
+            image[reg:reg + len(data)] = data
+        return bytes(image)
+
+    def output_reg(self, databyte):
+        """Output register content by its compiled definition.
+
+        - Converters are applied at any detail level, because they decode
+          the values of time keeping registers.
+        """
+        reg_ann, fields = self.reg_map[self.reg]
+        # Bits row
+        if not self.ann_bits:
+            for ann, lsb, msb, values, fn in fields:
+                if fn is not None:
+                    fn(values[databyte], databyte)
+        else:
+            for ann, lsb, msb, values, fn in fields:
+                if fn is None:
+                    self.putb(lsb, msb + 1, ann)
+                    continue
+                annots = fn(values[databyte], databyte)
+                if annots is not None:
+                    self.putd(lsb, msb, [ann, annots])
+        # Registers row
+        if self.ann_regs:
+            annots = self.compose_annot(reg_ann, ann_action=True)
+            self.put(self.ssd, self.es, self.out_ann, [reg_ann, annots])
+
+    def collect_nvram(self, databyte):
+        """Collect NVRAM data byte to the burst of consecutive bytes."""
+        if not self.nvram_data:
+            self.nvram_reg = self.reg
+            self.nvram_ss = self.ssd
+        self.nvram_data.append(databyte)
+        self.nvram_es = self.es
+
+    def output_nvram(self):
+        """Output burst of NVRAM bytes as one annotation.
+
+        - The annotation contains the address range, number of bytes, and
+          hexadecimal dump of the bytes.
+        """
+        if not self.nvram_data:
+            return
+        count = len(self.nvram_data)
+        val = self.device_tag("{}-{} ({} B): {}".format(
+            self.radix_table[self.nvram_reg],
+            self.radix_table[self.nvram_reg + count - 1],
+            count,
+            self.nvram_data.hex(" "),
+        ))
+        ann = AnnInfo.NVRAM
+        act = self.format_rw()
+        annots = compose_annot(info[ann], ann_value=val, ann_action=act)
+        self.put(self.nvram_ss, self.nvram_es, self.out_ann, [ann, annots])
+        self.nvram_data = bytearray()
+
+    def convert_halt(self, value, databyte):
+        """Process Clock halt bit."""
+        ch_l = ("Run", "Halt")[value]
+        ch_s = ch_l[0].upper()
+        return self.compose_annot(AnnBits.CH, ann_value=(value, ch_l, ch_s))
+
+    def convert_second(self, value, databyte):
+        """Process seconds (0-59)."""
+        self.second = bcd_values[value]
+        return self.compose_annot(AnnBits.SECOND, ann_value=self.second)
+
+    def convert_minute(self, value, databyte):
+        """Process minutes (0-59)."""
+        self.minute = bcd_values[value]
+        return self.compose_annot(AnnBits.MINUTE, ann_value=self.minute)
+
+    def convert_mode(self, value, databyte):
+        """Process 12/24 hours mode."""
+        val = ("24h", "12h")[value]
+        return self.compose_annot(AnnBits.MODE, ann_value=val)
+
+    def convert_ampm(self, value, databyte):
+        """Process AM/PM bit in 12 hours mode only."""
+        if not databyte >> TimeBits.MODE & 1:
+            return None
+        pm_l = ("AM", "PM")[value]
+        pm_s = pm_l[0].upper()
+        return self.compose_annot(AnnBits.AMPM, ann_value=(value, pm_l, pm_s))
+
+    def convert_hour12(self, value, databyte):
+        """Process hours (1-12) in 12 hours mode only.
+
+        - Convert hours to 24 hours mode to instance variable for formatting.
+        """
+        if not databyte >> TimeBits.MODE & 1:
+            return None
+        self.hour = bcd_values[value] % 12
+        if databyte >> TimeBits.AMPM & 1:
+            self.hour += 12
+        return self.compose_annot(AnnBits.HOUR, ann_value=self.hour)
+
+    def convert_hour24(self, value, databyte):
+        """Process hours (0-23) in 24 hours mode only."""
+        if databyte >> TimeBits.MODE & 1:
+            return None
+        self.hour = bcd_values[value]
+        return self.compose_annot(AnnBits.HOUR, ann_value=self.hour)
+
+    def convert_weekday(self, value, databyte):
+        """Process weekday (1-7).
+
+        - Recalculate weekday in respect to starting weekday option to instance
+          variable for formatting.
+        """
+        self.weekday = self.weekday_table[value]
+        weekday = weekdays[self.weekday]
+        return self.compose_annot(AnnBits.WEEKDAY, ann_value=weekday)
+
+    def convert_day(self, value, databyte):
+        """Process day (1-31)."""
+        self.day = bcd_values[value]
+        return self.compose_annot(AnnBits.DAY, ann_value=self.day)
+
+    def convert_month(self, value, databyte):
+        """Process month (1-12)."""
+        self.month = bcd_values[value]
+        return self.compose_annot(AnnBits.MONTH,
+                                  ann_value=month_names[value])
+
+    def convert_year(self, value, databyte):
+        """Process year (0-99).
+
+        - Add 2000 to double digit year number (expect 21st century)
+          to instance variable for formatting.
+        """
+        self.year = bcd_values[value] + 2000
+        return self.compose_annot(AnnBits.YEAR, ann_value=self.year)
+
+    def convert_out(self, value, databyte):
+        """Process OUT bit of control register."""
+        return self.compose_annot(AnnBits.OUT, ann_value=value)
+
+    def convert_sqwe(self, value, databyte):
+        """Process SQWE bit of control register."""
+        sqwe_l = ("dis", "en")[value] + "abled"
+        sqwe_s = sqwe_l[0].upper()
+        return self.compose_annot(AnnBits.SQWE,
+                                  ann_value=(value, sqwe_l, sqwe_s))
+
+    def convert_rate(self, value, databyte):
+        """Process RS bits of control register.
+
+        - Remember the programmed square wave rate for its verification.
+        """
+        self.sqw_rate = register_values[Register.CONTROL][databyte]
+        ann = AnnBits.RS0
+        rate = rates[value]
+        annots = self.compose_annot(ann, ann_value=rate,
+                                    ann_unit=Params.UNIT_HZ)
+        annots_add = self.compose_annot(ann, ann_value=rate // 1000,
+                                        ann_unit=Params.UNIT_KHZ)
+        return annots + annots_add
+
+    def convert_nvram(self, value, databyte):
+        """Process NVRAM."""
+        return self.compose_annot(AnnBits.NVRAM, ann_value=value,
+                                  ann_radix=True)
+
+    def on_bits(self, databyte):
+        """Collect packet of bits that belongs to the following command.
+
+        - Packet is in the form of list of bit lists:
+            ["BITS", [[bit, startsample, endsample], ...]
+        - Samples are counted for aquisition sampling frequency.
+        - Parent decoder ``i2c``stores individual bits in the list from
+          the least significant bit (LSB) to the most significant bit
+          (MSB) as it is at representing numbers in computers, although I2C
+          bus transmits data in oposite order with MSB first.
+        - Only the recent packet is kept in the fixed size bits window,
+          because annotations span bits of the current byte only.
+        """
+        self.bits[:] = databyte
+
+    def on_start(self, databyte):
+        """Start an I2C transmission."""
+        self.ssb = self.ss
+        self.state = State.ADDRESS
+
+    def on_address_write(self, databyte):
+        """Process slave address for writing."""
+        if self.check_addr(databyte):
+            self.collect_data(databyte)
+            self.handle_address()
+            self.write = True
+            self.state = State.POINTER
+        else:
+            self.state = State.FOREIGN
+
+    def on_address_read(self, databyte):
+        """Process slave address for reading."""
+        if self.check_addr(databyte):
+            self.collect_data(databyte)
+            self.handle_address()
+            self.write = False
+            self.state = State.DATA
+        else:
+            self.state = State.FOREIGN
+
+    def on_pointer(self, databyte):
+        """Process initial slave register.
+
+        - The pointer is masked to the address space of the device, a pointer
+          out of it, e.g., of another chip or by a bus error, is warned about.
+        """
+        self.reg = databyte & NvRAM.MAX
+        self.collect_data(databyte)
+        if databyte > NvRAM.MAX:
+            self.output_warning("register pointer out of range")
+        self.handle_pointer()
+        self.state = State.DATA
+
+    def on_nodata(self, databyte):
+        """Output end of transmission without any register and data."""
+        self.handle_nodata()
+        self.state = State.IDLE
+
+    def on_data(self, databyte):
+        """Process slave register."""
+        self.collect_data(databyte)
+        self.handle_reg()
+
+    def on_restart(self, databyte):
+        """Wait for a slave address after repeated start."""
+        self.output_nvram()
+        self.state = State.ADDRESS
+
+    def on_stop(self, databyte):
+        """Process end of transmission and wait for next one."""
+        self.handle_stop()
+        self.state = State.IDLE
+
+    def on_foreign_stop(self, databyte):
+        """Finish skipping of the transmission to a foreign slave."""
+        self.foreign_es = self.es
+        self.state = State.IDLE
+
+    def compile_transitions(self, transmap):
+        """Compile transition map to the list of lookups of commands.
+
+        - The list is indexed by state, the lookup of a state is the bound
+          ``get`` method of the dictionary mapping commands to bound
+          transition methods, so that decoding a packet takes no attribute
+          lookup of the dictionary.
+        """
+        return [
+            {cmd: getattr(self, fn) for cmd, fn in transmap[state].items()}.get
+            for state in range(len(transmap))
+        ]
+
+    def decode(self, ss, es, data):
+        """Decode samples provided by parent decoder.
+
+        - Packets with commands without transition in the current state
+          are ignored.
+        """
+        cmd, databyte = data
+        self.ss, self.es = ss, es
+        transition = self.transitions[self.state](cmd)
+        if transition is not None:
+            transition(databyte)
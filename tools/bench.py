@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""Benchmark of the decoder on synthetic bus captures.
+
+Copyright (C) 2018-2019 Libor Gabaj <libor.gabaj@gmail.com>
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, see <http://www.gnu.org/licenses/>.
+
+DESCRIPTION:
+Each scenario generates packets of the ``i2c`` decoder lazily up to the
+required number of them, so that captures of tens of millions of packets
+do not need to fit into memory. Every scenario runs in a separate process,
+which reports the decoding rate of packets and annotations, and the peak
+resident memory of the process.
+
+USAGE:
+    python3 tools/bench.py [-n events] [-o option=value ...] [scenario ...]
+
+"""
+
+import argparse
+import datetime
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import replay   # noqa: E402
+
+SAMPLERATE = 1000000    # Samples per second
+BIT_SAMPLES = 10        # Samples per bit at 100 kHz bus
+SLAVE = 0x68
+FOREIGN = (0x20, 0x3c, 0x50, 0x76)
+
+
+def int2bcd(value):
+    """Convert integer to BCD coded byte."""
+    return (value // 10) << 4 | value % 10
+
+
+def time_regs(moment, mode12h=False):
+    """Return content of time keeping registers for the datetime."""
+    if mode12h:
+        hour = moment.hour % 12 or 12
+        hour = 1 << 6 | (moment.hour >= 12) << 5 | int2bcd(hour)
+    else:
+        hour = int2bcd(moment.hour)
+    return [
+        int2bcd(moment.second), int2bcd(moment.minute), hour,
+        moment.isoweekday(), int2bcd(moment.day), int2bcd(moment.month),
+        int2bcd(moment.year % 100),
+    ]
+
+
+###############################################################################
+# Scenarios
+###############################################################################
+def scenario_poll(bus):
+    """Read time keeping registers once per second."""
+    moment = datetime.datetime(2019, 1, 1)
+    while True:
+        yield bus.read(SLAVE, 0, time_regs(moment))
+        bus.idle(SAMPLERATE)
+        moment += datetime.timedelta(seconds=1)
+
+
+def scenario_burst(bus):
+    """Read entire address space wrapping around from the NVRAM."""
+    moment = datetime.datetime(2019, 1, 1)
+    nvram = [databyte & 0xff for databyte in range(56)]
+    while True:
+        yield bus.read(SLAVE, 0x08, nvram + time_regs(moment) + [0x10])
+        moment += datetime.timedelta(seconds=1)
+
+
+def scenario_nvram(bus):
+    """Write and read back the entire NVRAM."""
+    counter = 0
+    while True:
+        nvram = [(counter + databyte) & 0xff for databyte in range(56)]
+        yield bus.write(SLAVE, 0x08, nvram)
+        yield bus.read(SLAVE, 0x08, nvram)
+        counter += 1
+
+
+def scenario_hours(bus):
+    """Write hours alternately in 12 and 24 hours mode."""
+    hour = 0
+    while True:
+        moment = datetime.datetime(2019, 1, 1, hour)
+        yield bus.write(SLAVE, 0x02, [time_regs(moment, hour % 2)[2]])
+        hour = (hour + 1) % 24
+
+
+def scenario_mixed(bus):
+    """Poll time keeping registers among transactions of foreign slaves."""
+    polls = scenario_poll(bus)
+    counter = 0
+    while True:
+        yield next(polls)
+        for addr in FOREIGN * 3:
+            yield bus.write(addr, counter & 0xff, [counter & 0xff])
+            yield bus.read(addr, None, [counter & 0xff] * 4)
+        counter += 1
+
+
+scenarios = {
+    "poll": scenario_poll,
+    "burst": scenario_burst,
+    "nvram": scenario_nvram,
+    "hours": scenario_hours,
+    "mixed": scenario_mixed,
+}
+
+
+def generate(scenario, events):
+    """Generate packets of the scenario up to the number of them."""
+    bus = replay.Bus(BIT_SAMPLES)
+    count = 0
+    for packets in scenarios[scenario](bus):
+        for packet in packets:
+            yield packet
+            count += 1
+            if count >= events:
+                return
+
+
+###############################################################################
+# Measurement
+###############################################################################
+def measure(scenario, events, options=None):
+    """Decode the scenario and return measured results."""
+    replay.load_decoder()
+    output_ann = sys.modules["sigrokdecode"].OUTPUT_ANN
+    counts = {"annotations": 0}
+
+    def sink(ss, es, output_type, data):
+        if output_type == output_ann:
+            counts["annotations"] += 1
+
+    rep = replay.Replay(options, SAMPLERATE, sink)
+    start = time.perf_counter()
+    rep.feed(generate(scenario, events))
+    rep.finish()
+    elapsed = time.perf_counter() - start
+    return {
+        "scenario": scenario,
+        "events": rep.events,
+        "annotations": counts["annotations"],
+        "seconds": elapsed,
+        "events_per_sec": rep.events / elapsed,
+        "annotations_per_sec": counts["annotations"] / elapsed,
+        "peak_rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+def main(argv=None):
+    """Run scenarios in separate processes and print the report."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("scenario", nargs="*",
+                        help="scenario to run, all by default: {}".format(
+                            ", ".join(scenarios)))
+    parser.add_argument("-n", "--events", type=int, default=100000,
+                        help="number of packets per scenario")
+    parser.add_argument("-o", "--option", action="append", default=[],
+                        metavar="ID=VALUE", help="decoder option")
+    parser.add_argument("--child", action="store_true",
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    options = replay.parse_options(args.option)
+    for scenario in args.scenario:
+        if scenario not in scenarios:
+            parser.error("unknown scenario {}".format(scenario))
+    if args.child:
+        print(json.dumps(measure(args.scenario[0], args.events, options)))
+        return
+    print("{:<8} {:>12} {:>12} {:>14} {:>14} {:>12}".format(
+        "scenario", "events", "annots", "events/s", "annots/s", "peak KiB"))
+    for scenario in args.scenario or scenarios:
+        cmd = [sys.executable, os.path.abspath(__file__), "--child",
+               "-n", str(args.events), scenario]
+        for opt in args.option:
+            cmd += ["-o", opt]
+        result = json.loads(subprocess.check_output(cmd))
+        print("{scenario:<8} {events:>12} {annotations:>12}"
+              " {events_per_sec:>14.0f} {annotations_per_sec:>14.0f}"
+              " {peak_rss_kib:>12}".format(**result))
+
+
+if __name__ == "__main__":
+    main()
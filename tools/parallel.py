@@ -0,0 +1,397 @@
+# -*- coding: utf-8 -*-
+"""Parallel decoding of recorded packets in chunks.
+
+Copyright (C) 2018-2019 Libor Gabaj <libor.gabaj@gmail.com>
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, see <http://www.gnu.org/licenses/>.
+
+DESCRIPTION:
+The file of JSON lines with packets is cut into chunks at transaction
+boundaries, i.e., at a START condition following a STOP one, found by
+a byte scan around estimated chunk offsets only. Chunks are scanned in
+a process pool by a light scan following the transaction state machine of
+the decoder without any output, which records the effect of the chunk on
+the register pointer, last r/w direction, and content of the device. The
+effects are folded serially to the initial states of chunks, which are then
+decoded in the pool by decoders with restored state. Their outputs are
+passed by temporary files and generated in the order of chunks, which is
+the order of samples. Finally the summaries of the entire capture are
+output.
+
+Options depending on the history of outputs, i.e., 'changes', 'history',
+'stats', 'drift', 'timing', and 'summary' periods, cannot be split into
+chunks, as well as the 'export' to a single file. The scan follows the
+default slave address only, so the packets are decoded serially with any
+of them or with custom 'addresses'.
+
+USAGE:
+    python3 tools/parallel.py [-j processes] [-c packets] [-o option=value]
+        [--check] events.jsonl
+
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import pickle
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import replay   # noqa: E402
+
+SERIAL_OPTIONS = {
+    "changes": "yes", "history": "yes", "stats": "yes", "drift": "yes",
+    "timing": "yes",
+}
+SERIAL_VALUES = ("export", "summary", "addresses")  # Any non-empty value
+OUTPUT_BATCH = 4096     # Outputs pickled at once
+
+
+def serial_only(options):
+    """Return flag about options requiring serial decoding."""
+    if any(options.get(name) for name in SERIAL_VALUES):
+        return True
+    return any(options.get(name) == value
+               for name, value in SERIAL_OPTIONS.items())
+
+
+def cut_chunks(path, chunk_packets):
+    """Cut the file into chunks at transaction boundaries.
+
+    - The length of a chunk in bytes is estimated from the average length of
+      the lines at the beginning of the file, so that only lines around
+      the boundaries are read.
+
+    Returns
+    -------
+    list
+        Tuples (start offset, end offset) of chunks.
+
+    """
+    size = os.path.getsize(path)
+    offsets = [0]
+    with open(path, "rb") as file:
+        sample = file.read(1 << 20)
+        line_bytes = len(sample) / max(sample.count(b"\n"), 1)
+        step = max(int(chunk_packets * line_bytes), 1)
+        target = step
+        while target < size:
+            offset = find_boundary(file, target)
+            if offset is None:
+                break
+            offsets.append(offset)
+            target = offset + step
+    offsets.append(size)
+    return list(zip(offsets, offsets[1:]))
+
+
+def find_boundary(file, offset):
+    """Return offset of the first transaction start after the offset.
+
+    - The boundary is a START condition following a STOP condition of
+      a transmission with an address, after which the decoder is always
+      idle regardless of its state.
+    """
+    file.seek(offset)
+    file.readline()     # Rest of the line cut by the offset
+    addressed = stopped = False
+    while True:
+        line_offset = file.tell()
+        line = file.readline()
+        if not line:
+            return None
+        cmd = command(line)
+        if cmd in (None, b"BITS"):
+            continue
+        if cmd == b"START" and stopped:
+            return line_offset
+        stopped = cmd == b"STOP" and addressed
+        if cmd in (b"START", b"START REPEAT"):
+            addressed = False
+        elif cmd.startswith(b"ADDRESS"):
+            addressed = True
+
+
+def command(line):
+    """Return command of the packet line without JSON parsing."""
+    parts = line.split(b'"', 2)
+    return parts[1] if len(parts) == 3 else None
+
+
+def databyte(line):
+    """Return data byte of the packet line without JSON parsing."""
+    return int(line.rsplit(b",", 1)[1].strip(b" ]\r\n"))
+
+
+def scan_chunk(args):
+    """Scan transactions of the chunk for its effect on the device state.
+
+    - The scan follows the transaction state machine of the decoder without
+      any output.
+    - Data bytes before the first register pointer of the chunk are recorded
+      relatively to the unknown pointer at the chunk start, the following
+      ones in the image of the device with the mask of written registers.
+
+    Returns
+    -------
+    dict
+        Relative data bytes, the image and mask, final register pointer or
+        None if no pointer is written, and the last r/w direction or None.
+
+    """
+    path, start, end = args
+    package = replay.load_decoder()
+    core = package.core
+    relative = bytearray()
+    image = bytearray(core.NvRAM.MAX + 1)
+    mask = 0
+    reg = None
+    write = None
+    state = "IDLE"
+    with open(path, "rb") as file:
+        file.seek(start)
+        lines = file.read(end - start).splitlines()
+    for line in lines:
+        cmd = command(line)
+        if cmd in (None, b"BITS"):
+            continue
+        # Transaction state machine of the decoder
+        if state == "FOREIGN":
+            if cmd in (b"START", b"START REPEAT"):
+                state = "ADDRESS SLAVE"
+            elif cmd == b"STOP":
+                state = "IDLE"
+        elif state == "IDLE":
+            if cmd == b"START":
+                state = "ADDRESS SLAVE"
+        elif state == "ADDRESS SLAVE":
+            if cmd in (b"ADDRESS WRITE", b"ADDRESS READ"):
+                if databyte(line) != core.Address.SLAVE:
+                    state = "FOREIGN"
+                elif cmd == b"ADDRESS READ":
+                    write = False
+                    state = "REGISTER DATA"
+                else:
+                    write = True
+                    state = "REGISTER ADDRESS"
+        elif state == "REGISTER ADDRESS":
+            if cmd == b"DATA WRITE":
+                reg = databyte(line) & core.NvRAM.MAX
+                state = "REGISTER DATA"
+            elif cmd == b"STOP":
+                state = "IDLE"
+        elif state == "REGISTER DATA":
+            if cmd in (b"DATA WRITE", b"DATA READ"):
+                if reg is None:
+                    relative.append(databyte(line))
+                else:
+                    image[reg] = databyte(line)
+                    mask |= 1 << reg
+                    reg = (reg + 1) & core.NvRAM.MAX
+            elif cmd == b"START REPEAT":
+                state = "ADDRESS SLAVE"
+            elif cmd == b"STOP":
+                state = "IDLE"
+    return {
+        "relative": relative.hex(), "image": image.hex(), "mask": mask,
+        "reg": reg, "write": write,
+    }
+
+
+def fold_states(scans, options):
+    """Return initial states of chunks by folding effects of previous ones.
+
+    - Relative data bytes are skipped with unknown register pointer, as the
+      decoder does.
+    """
+    package = replay.load_decoder()
+    core = package.core
+    defaults = {opt["id"]: opt["default"] for opt in package.Decoder.options}
+    defaults.update(options)
+    reg = defaults["pointer"] & core.NvRAM.MAX \
+        if defaults["pointer"] >= 0 else -1
+    shadow = bytearray(core.NvRAM.MAX + 1)
+    known = 0
+    write = True
+    states = []
+    for scan in scans:
+        states.append({
+            "reg": reg, "write": write,
+            "shadow": shadow.hex(), "shadow_known": known,
+        })
+        if reg >= 0:
+            for value in bytes.fromhex(scan["relative"]):
+                shadow[reg] = value
+                known |= 1 << reg
+                reg = (reg + 1) & core.NvRAM.MAX
+        if scan["reg"] is not None:
+            image = bytes.fromhex(scan["image"])
+            for addr in range(core.NvRAM.MAX + 1):
+                if scan["mask"] >> addr & 1:
+                    shadow[addr] = image[addr]
+            known |= scan["mask"]
+            reg = scan["reg"]
+        if scan["write"] is not None:
+            write = scan["write"]
+    return states
+
+
+def decode_chunk(args):
+    """Decode a chunk of the file to a temporary file of outputs.
+
+    - Outputs are pickled in batches to the file in the directory, so that
+      neither the worker nor the main process keeps outputs of the whole
+      chunk in memory.
+
+    Returns
+    -------
+    tuple
+        Path to the file of outputs and final state of the decoder.
+
+    """
+    path, options, start, end, state, out_dir = args
+    fd, out_path = tempfile.mkstemp(suffix=".pickle", dir=out_dir)
+    with os.fdopen(fd, "wb") as out_file:
+        batch = []
+
+        def sink(ss, es, output_type, data):
+            batch.append((ss, es, output_type, data))
+            if len(batch) >= OUTPUT_BATCH:
+                pickle.dump(batch, out_file, pickle.HIGHEST_PROTOCOL)
+                batch.clear()
+
+        rep = replay.Replay(options, sink=sink)
+        rep.core.restore_state(state)
+        rep.core.restore_registers()
+        with open(path, "rb") as file:
+            file.seek(start)
+            lines = file.read(end - start).splitlines()
+        rep.feed(
+            (ss, es, [cmd, data])
+            for ss, es, cmd, data in map(json.loads, filter(None, lines))
+        )
+        if batch:
+            pickle.dump(batch, out_file, pickle.HIGHEST_PROTOCOL)
+    return out_path, rep.core.snapshot_state()
+
+
+def read_outputs(out_path):
+    """Generate outputs from the temporary file and remove it."""
+    try:
+        with open(out_path, "rb") as file:
+            while True:
+                try:
+                    batch = pickle.load(file)
+                except EOFError:
+                    break
+                yield from batch
+    finally:
+        os.remove(out_path)
+
+
+def decode_serial(path, options):
+    """Decode the file serially and return outputs."""
+    rep = replay.Replay(options)
+    rep.feed(replay.read_events(path))
+    rep.finish()
+    return rep.outputs
+
+
+def iter_parallel(path, options=None, processes=None, chunk_packets=100000):
+    """Decode the file in chunks by the process pool and generate outputs.
+
+    - Chunks are scanned for their effect on the device state and decoded
+      in parallel, only folding of the effects is serial.
+    - Outputs are generated in the order of chunks as soon as the chunk
+      is decoded.
+    """
+    options = options or {}
+    if serial_only(options):
+        yield from decode_serial(path, options)
+        return
+    chunks = cut_chunks(path, chunk_packets)
+    foreign_count = {}
+    foreign_ss = None
+    foreign_es = 0
+    state = None
+    with tempfile.TemporaryDirectory(prefix="ds1307-") as out_dir, \
+            multiprocessing.Pool(processes) as pool:
+        scans = pool.map(scan_chunk,
+                         [(path, start, end) for start, end in chunks],
+                         chunksize=1)
+        states = fold_states(scans, options)
+        results = pool.imap(
+            decode_chunk,
+            [(path, options, start, end, state, out_dir)
+             for (start, end), state in zip(chunks, states)],
+            chunksize=1,
+        )
+        for out_path, state in results:
+            yield from read_outputs(out_path)
+            if state["foreign_count"]:
+                if foreign_ss is None:
+                    foreign_ss = state["foreign_ss"]
+                foreign_es = state["foreign_es"]
+                for addr, count in state["foreign_count"]:
+                    foreign_count[addr] = foreign_count.get(addr, 0) + count
+    # Summaries of the entire capture
+    state["foreign_count"] = sorted(foreign_count.items())
+    state["foreign_ss"] = foreign_ss or 0
+    state["foreign_es"] = foreign_es
+    rep = replay.Replay(options)
+    rep.core.restore_state(state)
+    rep.finish()
+    yield from rep.outputs
+
+
+def decode_parallel(path, options=None, processes=None, chunk_packets=100000):
+    """Decode the file in chunks by the process pool and return outputs."""
+    return list(iter_parallel(path, options, processes, chunk_packets))
+
+
+def main(argv=None):
+    """Decode recorded packets in parallel and print annotations."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("events", help="file of JSON lines with packets")
+    parser.add_argument("-j", "--processes", type=int, default=None,
+                        help="number of processes, all cores by default")
+    parser.add_argument("-c", "--chunk", type=int, default=100000,
+                        help="minimal number of packets in a chunk")
+    parser.add_argument("-o", "--option", action="append", default=[],
+                        metavar="ID=VALUE", help="decoder option")
+    parser.add_argument("--check", action="store_true",
+                        help="compare outputs with serial decoding")
+    args = parser.parse_args(argv)
+    options = replay.parse_options(args.option)
+    outputs = iter_parallel(args.events, options, args.processes,
+                            args.chunk)
+    if args.check:
+        serial = decode_serial(args.events, options)
+        identical = all(
+            parallel == serial
+            for parallel, serial in itertools.zip_longest(outputs, serial)
+        )
+        print("Identical to serial decoding: {}".format(identical))
+        sys.exit(not identical)
+    output_ann = sys.modules["sigrokdecode"].OUTPUT_ANN
+    for ss, es, output_type, data in outputs:
+        if output_type == output_ann:
+            print("{}-{} {}: {}".format(ss, es, data[0], data[1][0]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+"""Offline replay harness of the decoder.
+
+Copyright (C) 2018-2019 Libor Gabaj <libor.gabaj@gmail.com>
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, see <http://www.gnu.org/licenses/>.
+
+DESCRIPTION:
+The module loads the decoder package with stand-in modules of
+libsigrokdecode from the directory ``srdstub`` and feeds the decoder with
+packets of the ``i2c`` protocol decoder. Packets are tuples
+``(ss, es, [cmd, data])`` either recorded in a file of JSON lines
+``[ss, es, cmd, data]`` or generated synthetically by the ``Bus`` builder.
+Outputs of the decoder are collected in memory or passed to a sink.
+
+Rising edges of the square wave output SQW/OUT of the chip can be recorded
+in a file of sample numbers, one per line. They are measured by the decoder
+core and compared with the rate programmed in the control register.
+
+USAGE:
+    python3 tools/replay.py [-o option=value ...] [-r samplerate]
+        [-e edges.txt] events.jsonl
+
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STUB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "srdstub")
+PACKAGE = "ds1307"
+
+
+def load_decoder():
+    """Import the decoder package with stand-in libsigrokdecode modules.
+
+    - The stand-in modules take precedence, because the genuine ones work
+      only inside a libsigrokdecode session.
+    """
+    if PACKAGE in sys.modules:
+        return sys.modules[PACKAGE]
+    if STUB not in sys.path:
+        sys.path.insert(0, STUB)
+    spec = importlib.util.spec_from_file_location(
+        PACKAGE, os.path.join(ROOT, "__init__.py"),
+        submodule_search_locations=[ROOT])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[PACKAGE] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+###############################################################################
+# Replay driver
+###############################################################################
+class Replay:
+    """Driver feeding the decoder with packets of the i2c decoder.
+
+    Arguments
+    ---------
+    options : dict
+        Decoder options overriding their default values.
+    samplerate : integer
+        Sample rate of the capture passed to the decoder metadata.
+    sink : callable
+        Receiver of outputs with arguments start sample, end sample,
+        output type, and data. If none, outputs are collected in the
+        list ``outputs``.
+
+    """
+
+    def __init__(self, options=None, samplerate=None, sink=None):
+        """Create and start the decoder."""
+        package = load_decoder()
+        self.srd = sys.modules["sigrokdecode"]
+        self.decoder = package.Decoder()
+        self.decoder.options = {
+            opt["id"]: opt["default"] for opt in package.Decoder.options
+        }
+        self.decoder.options.update(options or {})
+        self.decoder.srd_sink = sink
+        self.decoder.start()
+        if samplerate and hasattr(self.decoder, "metadata"):
+            self.decoder.metadata(self.srd.SRD_CONF_SAMPLERATE, samplerate)
+        self.events = 0
+
+    @property
+    def core(self):
+        """Decoder core with the protocol logic and state."""
+        return self.decoder.core
+
+    @property
+    def outputs(self):
+        """List of collected outputs as tuples (ss, es, type, data)."""
+        return self.decoder.srd_outputs
+
+    def feed(self, events, edges=None):
+        """Decode packets and return number of them.
+
+        - Rising edges of the square wave output are sample numbers, which
+          are interleaved with packets in the order of samples.
+        """
+        decode = self.decoder.decode
+        count = 0
+        if edges is None:
+            for ss, es, data in events:
+                decode(ss, es, data)
+                count += 1
+        else:
+            sqw_edge = self.core.sqw_edge
+            edges = iter(edges)
+            edge = next(edges, None)
+            for ss, es, data in events:
+                while edge is not None and edge < ss:
+                    sqw_edge(edge)
+                    edge = next(edges, None)
+                decode(ss, es, data)
+                count += 1
+            while edge is not None:
+                sqw_edge(edge)
+                edge = next(edges, None)
+        self.events += count
+        return count
+
+    def finish(self):
+        """Finish decoding at the end of packets."""
+        self.decoder.end()
+
+    def annotations(self):
+        """Return collected annotations as tuples (ss, es, index, texts)."""
+        return [
+            (ss, es, data[0], data[1])
+            for ss, es, output_type, data in self.outputs
+            if output_type == self.srd.OUTPUT_ANN
+        ]
+
+
+###############################################################################
+# Synthetic bus
+###############################################################################
+class Bus:
+    """Builder of packets of the i2c decoder for a synthetic bus.
+
+    - Packets are generated with running sample numbers for the bit period
+      in samples.
+    - Each byte is preceded by the packet of its bits and followed by the
+      acknowledge packet.
+    """
+
+    def __init__(self, bit_samples=10, start_sample=0):
+        """Initialize sample counter."""
+        self.bit_samples = bit_samples
+        self.sample = start_sample
+
+    def idle(self, samples):
+        """Advance the bus time without any packet."""
+        self.sample += samples
+        return []
+
+    def condition(self, cmd):
+        """Return packets of a bus condition START, START REPEAT, STOP."""
+        ss = self.sample
+        self.sample += self.bit_samples
+        return [(ss, self.sample, [cmd, None])]
+
+    def byte(self, cmd, databyte, ack=True):
+        """Return packets of an address or data byte with acknowledge."""
+        ss = self.sample
+        period = self.bit_samples
+        bits = [
+            [databyte >> bit & 1,
+             ss + (7 - bit) * period, ss + (8 - bit) * period]
+            for bit in range(8)
+        ]
+        es = ss + 8 * period
+        self.sample = es + period
+        return [
+            (ss, es, ["BITS", bits]),
+            (ss, es, [cmd, databyte]),
+            (es, self.sample, ["ACK" if ack else "NACK", None]),
+        ]
+
+    def write(self, addr, reg, data=()):
+        """Return packets of a transaction writing data from a register."""
+        packets = self.condition("START")
+        packets += self.byte("ADDRESS WRITE", addr)
+        if reg is not None:
+            packets += self.byte("DATA WRITE", reg)
+        for databyte in data:
+            packets += self.byte("DATA WRITE", databyte)
+        packets += self.condition("STOP")
+        return packets
+
+    def read(self, addr, reg, data=()):
+        """Return packets of a transaction reading data from a register.
+
+        - If the register is none, the data are read from the current
+          register pointer without setting it.
+        """
+        packets = self.condition("START")
+        if reg is not None:
+            packets += self.byte("ADDRESS WRITE", addr)
+            packets += self.byte("DATA WRITE", reg)
+            packets += self.condition("START REPEAT")
+        # Address is transmitted with R/W bit
+        packets += self.byte("ADDRESS READ", addr)
+        for i, databyte in enumerate(data):
+            packets += self.byte("DATA READ", databyte,
+                                 ack=(i < len(data) - 1))
+        packets += self.condition("STOP")
+        return packets
+
+
+###############################################################################
+# Recorded packets
+###############################################################################
+def read_events(path):
+    """Generate packets from a file of JSON lines [ss, es, cmd, data]."""
+    with open(path) as file:
+        for line in file:
+            if not line.strip():
+                continue
+            ss, es, cmd, data = json.loads(line)
+            yield ss, es, [cmd, data]
+
+
+def write_events(path, events):
+    """Write packets to a file of JSON lines [ss, es, cmd, data]."""
+    with open(path, "w") as file:
+        for ss, es, (cmd, data) in events:
+            file.write(json.dumps([ss, es, cmd, data]) + "\n")
+
+
+def read_edges(path):
+    """Generate sample numbers of rising edges from a file of lines."""
+    with open(path) as file:
+        for line in file:
+            if line.strip():
+                yield int(line)
+
+
+def parse_options(args):
+    """Parse decoder options from arguments ID=VALUE.
+
+    - Values of options with integer default value are converted to integer.
+    """
+    package = load_decoder()
+    defaults = {opt["id"]: opt["default"] for opt in package.Decoder.options}
+    options = {}
+    for arg in args:
+        name, value = arg.split("=", 1)
+        if isinstance(defaults.get(name), int):
+            value = int(value, 0)
+        options[name] = value
+    return options
+
+
+def main(argv=None):
+    """Decode recorded packets and print annotations."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("events", help="file of JSON lines with packets")
+    parser.add_argument("-o", "--option", action="append", default=[],
+                        metavar="ID=VALUE", help="decoder option")
+    parser.add_argument("-r", "--samplerate", type=int, default=None,
+                        help="sample rate of the capture")
+    parser.add_argument("-e", "--edges", default=None,
+                        help="file of sample numbers of SQW rising edges")
+    args = parser.parse_args(argv)
+    options = parse_options(args.option)
+    replay = Replay(options, args.samplerate)
+    replay.feed(read_events(args.events),
+                read_edges(args.edges) if args.edges else None)
+    replay.finish()
+    for ss, es, ann, annots in replay.annotations():
+        print("{}-{} {}: {}".format(ss, es, ann, annots[0]))
+
+
+if __name__ == "__main__":
+    main()
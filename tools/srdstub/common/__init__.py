@@ -0,0 +1,2 @@
+# -*- coding: utf-8 -*-
+"""Stand-in of the libsigrokdecode common package for offline decoding."""
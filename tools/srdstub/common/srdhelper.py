@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""Stand-in of the libsigrokdecode helper module for offline decoding.
+
+Copyright (C) 2018-2019 Libor Gabaj <libor.gabaj@gmail.com>
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, see <http://www.gnu.org/licenses/>.
+
+DESCRIPTION:
+The module provides the helper functions used by the decoder with the same
+signatures and comparable results, so that the decoding can be profiled and
+regression tested outside of a libsigrokdecode installation.
+
+"""
+
+
+def bcd2int(b):
+    """Convert BCD coded byte to integer."""
+    return (b & 0x0F) + ((b >> 4) * 10)
+
+
+def format_data(data, radix):
+    """Format data value according to the radix option."""
+    formats = {
+        "Hex": "{:#04x}",
+        "Dec": "{:#d}",
+        "Oct": "{:#o}",
+        "Bin": "{:#010b}",
+    }
+    return formats.get(radix, "{}").format(data)
+
+
+def create_annots(annots_dict):
+    """Create a tuple of annotation definitions from dictionaries.
+
+    - The key of the input dictionary is an annotation prefix, the value is
+      a dictionary of annotation lists indexed by annotation index.
+    """
+    annots = []
+    for prefix, annots_list in annots_dict.items():
+        for ann in sorted(annots_list):
+            annots.append(
+                ("{}-{}".format(prefix, ann), annots_list[ann][0])
+            )
+    return tuple(annots)
+
+
+def compose_annot(ann_label="", ann_value=None, ann_unit=None,
+                  ann_action=None):
+    """Compose list of annotation texts from labels, values, and actions.
+
+    - Each of arguments can be a list with items specific for particular
+      annotation text, the last item is reused for remaining texts.
+    """
+    if not isinstance(ann_label, list):
+        ann_label = [ann_label]
+    if not isinstance(ann_value, list):
+        ann_value = [ann_value]
+    if not isinstance(ann_action, list):
+        ann_action = [ann_action]
+    annots = []
+    for i in range(max(len(ann_label), len(ann_value), len(ann_action))):
+        label = ann_label[min(i, len(ann_label) - 1)]
+        value = ann_value[min(i, len(ann_value) - 1)]
+        action = ann_action[min(i, len(ann_action) - 1)]
+        text = label
+        if action is not None:
+            text = "{} {}".format(action, text)
+        if value is not None:
+            text = "{}: {}".format(text, value)
+        if ann_unit is not None:
+            text = "{} {}".format(text, ann_unit)
+        annots.append(text)
+    return annots
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""Stand-in of the libsigrokdecode module for offline decoding.
+
+Copyright (C) 2018-2019 Libor Gabaj <libor.gabaj@gmail.com>
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, see <http://www.gnu.org/licenses/>.
+
+DESCRIPTION:
+The module provides only the part of the ``sigrokdecode`` interface used
+by stacked protocol decoders, i.e., output types, configuration keys, and
+the base class of decoders with methods ``register`` and ``put``.
+The replay harness always puts it before the genuine module on the module
+search path, because the genuine module works only inside a libsigrokdecode
+session.
+
+"""
+
+(OUTPUT_ANN, OUTPUT_PYTHON, OUTPUT_BINARY, OUTPUT_META) = range(4)
+
+(SRD_CONF_SAMPLERATE,) = (10000,)
+
+
+class Decoder:
+    """Base class of protocol decoders.
+
+    - Outputs are collected by the sink callable with arguments start sample,
+      end sample, output type, and data. By default they are appended to the
+      list ``srd_outputs`` as tuples.
+    """
+
+    srd_sink = None
+
+    def register(self, output_type, meta=None, proto_id=None):
+        """Register output type and return its identifier."""
+        if not hasattr(self, "srd_types"):
+            self.srd_types = []
+            self.srd_outputs = []
+        self.srd_types.append(output_type)
+        return len(self.srd_types) - 1
+
+    def put(self, ss, es, output_id, data):
+        """Output data of the registered output type."""
+        output_type = self.srd_types[output_id]
+        if self.srd_sink is None:
+            self.srd_outputs.append((ss, es, output_type, data))
+        else:
+            self.srd_sink(ss, es, output_type, data)
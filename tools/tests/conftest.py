@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+"""Configuration of tests collected by pytest.
+
+- The decoder directory is a package importing ``sigrokdecode``, which is
+  imported by pytest as the parent package of tests, so that the stand-in
+  modules must be importable before the collection.
+"""
+
+import os
+import sys
+
+STUB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))), "srdstub")
+if STUB not in sys.path:
+    sys.path.insert(0, STUB)
@@ -0,0 +1,577 @@
+# -*- coding: utf-8 -*-
+"""Regression tests of the decoder by the offline replay harness.
+
+Copyright (C) 2018-2019 Libor Gabaj <libor.gabaj@gmail.com>
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, see <http://www.gnu.org/licenses/>.
+
+DESCRIPTION:
+The decoder is fed with a synthetic capture of valid register accesses and
+its annotations are compared with the ones of the original decoder with
+handlers per register, recorded in the file ``data/baseline.json``.
+
+USAGE:
+    python3 -m pytest tools/tests
+
+"""
+
+import ast
+import datetime
+import json
+import os
+import random
+import struct
+import subprocess
+import sys
+import tempfile
+import unittest
+
+TESTS = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(os.path.dirname(TESTS))
+sys.path.insert(0, os.path.dirname(TESTS))
+import bench    # noqa: E402
+import parallel  # noqa: E402
+import replay   # noqa: E402
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+BASELINE = os.path.join(TESTS, "data", "baseline.json")
+SLAVE = 0x68
+
+
+def capture():
+    """Return packets of the synthetic capture with valid register content.
+
+    - The capture contains writes and reads of time keeping registers in
+      both hours modes, the control register, NVRAM bursts, reading
+      wrapped around the address space, continuing of the register pointer,
+      and a slave presence check.
+    """
+    bus = replay.Bus()
+    moment = datetime.datetime(2019, 3, 9, 23, 59, 58)
+    packets = bus.write(SLAVE, 0, bench.time_regs(moment) + [0x10])
+    for _ in range(4):
+        packets += bus.read(SLAVE, 0, bench.time_regs(moment))
+        moment += datetime.timedelta(seconds=1)
+    packets += bus.read(SLAVE, None, [0x10])
+    packets += bus.write(SLAVE, 0x08, list(range(0x20, 0x30)))
+    packets += bus.read(SLAVE, 0x3c, [0xaa, 0xbb, 0xcc, 0xdd]
+                        + bench.time_regs(moment) + [0x13])
+    moment = moment.replace(hour=15)
+    packets += bus.write(SLAVE, 0x02, [bench.time_regs(moment, True)[2]])
+    packets += bus.read(SLAVE, 0, bench.time_regs(moment, True))
+    for control in (0x00, 0x80, 0x11, 0x12):
+        packets += bus.write(SLAVE, 0x07, [control])
+    packets += bus.write(SLAVE, None)
+    packets += bus.read(SLAVE, 0x3e, [0x01, 0x02, 0x80])
+    return packets
+
+
+def drift_polls(bus, addrs, ppm, seconds, start):
+    """Return packets of reads of RTCs running with the drift in ppm.
+
+    - Devices are polled in turn every 137 ms for the seconds of the capture
+      time, so that polls are not synchronous with rollovers of the RTC.
+    """
+    packets = []
+    end = bus.sample + seconds * bench.SAMPLERATE
+    while bus.sample < end:
+        for addr in addrs:
+            elapsed = bus.sample / bench.SAMPLERATE * (1 + ppm / 1e6)
+            moment = start + datetime.timedelta(seconds=int(elapsed))
+            packets += bus.read(addr, 0, bench.time_regs(moment)[:3])
+        packets += bus.idle(bench.SAMPLERATE * 61 // 1000)
+    return packets
+
+
+def outputs_python(rep, cmd):
+    """Return data of Python outputs of the command."""
+    return [data[1] for ss, es, output_type, data in rep.outputs
+            if output_type == rep.srd.OUTPUT_PYTHON and data[0] == cmd]
+
+
+def annotations(options=None, packets=None):
+    """Decode packets and return annotations as JSON compatible lists."""
+    rep = replay.Replay(options)
+    rep.feed(capture() if packets is None else packets)
+    rep.finish()
+    return [[ss, es, ann, list(annots)]
+            for ss, es, ann, annots in rep.annotations()]
+
+
+class TestIdenticalOutput(unittest.TestCase):
+    """Outputs identical to the original decoder and between interfaces."""
+
+    def test_baseline(self):
+        """Compiled register map and transition table keep annotations."""
+        with open(BASELINE) as file:
+            expected = json.load(file)
+        self.assertEqual(annotations({"nvram": "Bytes"}), expected)
+
+    def test_core_stream(self):
+        """Core outside of the adapter outputs the same results."""
+        core = replay.load_decoder().core
+        srd = sys.modules["sigrokdecode"]
+        rep = replay.Replay()
+        rep.feed(capture())
+        rep.finish()
+        outputs = (srd.OUTPUT_ANN, srd.OUTPUT_PYTHON, srd.OUTPUT_BINARY)
+        expected = [(ss, es, outputs.index(output_type), data)
+                    for ss, es, output_type, data in rep.outputs]
+        engine = core.Core()
+        engine.start()
+        results = list(engine.stream(capture()))
+        self.assertEqual([tuple(result) for result in results], expected)
+
+    def test_core_standalone(self):
+        """Core is importable without libsigrokdecode modules."""
+        code = "import sys; sys.path[:] = [{!r}] + [p for p in sys.path " \
+            "if 'srdstub' not in p]; import core; core.Core().start()" \
+            .format(ROOT)
+        subprocess.run([sys.executable, "-I", "-c", code], check=True,
+                       cwd=TESTS)
+
+    def test_cache(self):
+        """One-off datetimes and warnings are not cached."""
+        core = replay.load_decoder().core
+        rep = replay.Replay()
+        rep.feed(capture())
+        rep.feed(replay.Bus().write(SLAVE, 0x04, [0x31, 0x02, 0x19]))
+        rep.finish()
+        self.assertFalse([key for key in rep.core.annots_cache
+                          if key[0] in (core.AnnInfo.DATETIME,
+                                        core.AnnInfo.WARN)])
+
+    def test_changes_order(self):
+        """Span of identical reads precedes a later NVRAM block."""
+        bus = replay.Bus()
+        packets = []
+        for _ in range(3):
+            packets += bus.read(SLAVE, 0x08, [0x01, 0x02])
+        packets += bus.write(SLAVE, 0x08, [0x03, 0x04])
+        texts = [annots[0] for ss, es, ann, annots in
+                 annotations({"changes": "yes"}, packets)]
+        self.assertIn("Read: 2 identical", texts)
+        self.assertLess(texts.index("Read: 2 identical"),
+                        texts.index("Write Memory: 0x08-0x09 (2 B): 03 04"))
+
+
+class TestInvalidInput(unittest.TestCase):
+    """Decoding of unexpected bus traffic without crashing."""
+
+    def test_pointer_out_of_range(self):
+        """Pointer above the address space is masked and warned about."""
+        bus = replay.Bus()
+        anns = annotations(packets=bus.write(SLAVE, 0x75, [0x12]))
+        self.assertIn("Warnings: register pointer out of range",
+                      [annots[0] for ss, es, ann, annots in anns])
+        rep = replay.Replay()
+        rep.feed(bus.write(SLAVE, 0x75, [0x12, 0x34]))
+        rep.finish()
+        self.assertEqual(rep.core.shadow[0x35:0x37], b"\x12\x34")
+        self.assertEqual(rep.core.reg, 0x37)
+
+    def test_register_errors(self):
+        """Invalid content of registers is warned about."""
+        bus = replay.Bus()
+        cases = (
+            (0x01, 0x5a, "minutes invalid BCD"),
+            (0x01, 0x85, "minutes reserved bits set"),
+            (0x02, 0x40, "hours out of range"),
+            (0x02, 0x13, None),
+            (0x02, 0x72, None),
+            (0x05, 0x00, "month out of range"),
+            (0x07, 0x04, "control reserved bits set"),
+            (0x07, 0x93, None),
+        )
+        for reg, databyte, warning in cases:
+            texts = [annots[0] for ss, es, ann, annots in annotations(
+                packets=bus.write(SLAVE, reg, [databyte]))
+                if annots[0].startswith("Warnings")]
+            expected = ["Warnings: " + warning] if warning else []
+            self.assertEqual(texts, expected, hex(databyte))
+
+    def test_invalid_date(self):
+        """Invalid date is warned about only by the transfer of the date."""
+        bus = replay.Bus()
+        packets = bus.write(SLAVE, 0x04, [0x31, 0x02, 0x19])
+        packets += bus.write(SLAVE, 0x07, [0x10])
+        packets += bus.read(SLAVE, 0x06, [0x19])
+        texts = [annots[0] for ss, es, ann, annots in annotations(
+            packets=packets) if annots[0].startswith("Warnings")]
+        self.assertEqual(texts, ["Warnings: invalid date"] * 2)
+
+    def test_register_values(self):
+        """Registers are decoded to numeric values by their bit fields."""
+        core = replay.load_decoder().core
+        values = core.register_values
+        self.assertEqual(values[core.Register.SECOND][0xd9], 59)
+        self.assertEqual(values[core.Register.HOUR][0x71], 23)
+        self.assertEqual(values[core.Register.HOUR][0x72], 12)
+        self.assertEqual(values[core.Register.HOUR][0x52], 0)
+        self.assertEqual(values[core.Register.HOUR][0x23], 23)
+        self.assertEqual(values[core.Register.YEAR][0x19], 2019)
+        self.assertEqual(values[core.Register.CONTROL][0x11], 4096)
+        self.assertEqual(values[core.Register.CONTROL][0x03], 0)
+        self.assertEqual(values[core.Register.NVRAM][0xa5], 0xa5)
+
+    def test_foreign_without_stop(self):
+        """Transaction after a foreign one without stop is decoded."""
+        bus = replay.Bus()
+        moment = datetime.datetime(2019, 3, 9, 23, 59, 58)
+        packets = bus.condition("START")
+        packets += bus.byte("ADDRESS WRITE", 0x50)
+        packets += bus.byte("DATA WRITE", 0x00)
+        packets += bus.read(SLAVE, 0, bench.time_regs(moment))
+        packets += bus.condition("START")
+        packets += bus.byte("ADDRESS WRITE", 0x50)
+        packets += bus.condition("START REPEAT")
+        packets += bus.byte("ADDRESS READ", SLAVE)
+        packets += bus.byte("DATA READ", 0x12)
+        packets += bus.condition("STOP")
+        texts = [annots[0] for ss, es, ann, annots in annotations(
+            packets=packets)]
+        self.assertIn("Read Datetime: Saturday 09.03.2019 23:59:58", texts)
+        self.assertIn("Read Control register", texts)
+
+
+class TestParallel(unittest.TestCase):
+    """Parallel decoding in chunks identical to the serial one."""
+
+    def test_identical(self):
+        """Small chunks cut pointer-less reads and foreign traffic."""
+        rand = random.Random(1307)
+        bus = replay.Bus()
+        moment = datetime.datetime(2019, 3, 9, 23, 59, 58)
+        packets = []
+        for _ in range(300):
+            kind = rand.randrange(6)
+            reg = rand.randrange(0x40)
+            data = [rand.randrange(256)
+                    for _ in range(rand.randrange(1, 6))]
+            if kind == 0:
+                packets += bus.read(SLAVE, None, data)
+            elif kind == 1:
+                packets += bus.read(SLAVE, reg, data)
+            elif kind == 2:
+                packets += bus.write(SLAVE, reg, data)
+            elif kind == 3:
+                packets += bus.read(SLAVE, 0, bench.time_regs(moment))
+                moment += datetime.timedelta(seconds=1)
+            elif kind == 4:
+                packets += bus.write(rand.choice(bench.FOREIGN), reg, data)
+            else:
+                packets += bus.condition("START")
+                packets += bus.byte("ADDRESS WRITE", 0x50)
+                packets += bus.byte("DATA WRITE", reg)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "capture.jsonl")
+            replay.write_events(path, packets)
+            for options in ({}, {"foreign": "Summary"},
+                            {"radix": "Dec", "nvram": "Bytes",
+                             "pointer": 0x20}):
+                self.assertEqual(
+                    parallel.decode_parallel(path, options, processes=2,
+                                             chunk_packets=50),
+                    parallel.decode_serial(path, options))
+
+
+class TestExport(unittest.TestCase):
+    """Export of register accesses to a file of NumPy structured array."""
+
+    def load(self, path):
+        """Return records of the file as tuples of their fields."""
+        if numpy is not None:
+            return [tuple(record.item())
+                    for record in numpy.load(path, mmap_mode="r")]
+        with open(path, "rb") as file:
+            content = file.read()
+        self.assertEqual(content[:8], b"\x93NUMPY\x01\x00")
+        length = struct.unpack_from("<H", content, 8)[0]
+        header = ast.literal_eval(content[10:10 + length].decode())
+        self.assertFalse(header["fortran_order"])
+        records = list(struct.iter_unpack("<QQBBBi", content[10 + length:]))
+        self.assertEqual(header["shape"], (len(records),))
+        return records
+
+    def test_records(self):
+        """Records correspond to data bytes of transactions."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "export.npy")
+            rep = replay.Replay({"export": path})
+            rep.feed(capture())
+            rep.finish()
+            records = self.load(path)
+        expected = []
+        for ss, es, output_type, data in rep.outputs:
+            if output_type != rep.srd.OUTPUT_PYTHON \
+                    or data[0] not in ("READ", "WRITE") or data[1].reg < 0:
+                continue
+            xfer = data[1]
+            for i, databyte in enumerate(xfer.data):
+                expected.append(((xfer.reg + i) & 0x3f, databyte,
+                                 xfer.write))
+        self.assertEqual([record[2:5] for record in records], expected)
+        self.assertEqual(records[0][2:], (0x00, 0x58, 1, 58))
+        self.assertEqual(records[5][2:], (0x05, 0x03, 1, 3))
+        starts = [record[0] for record in records]
+        self.assertEqual(starts, sorted(starts))
+        self.assertTrue(all(ss < es for ss, es, *_ in records))
+
+    def test_restart(self):
+        """Starting the decoder again closes the pending export."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "export.npy")
+            rep = replay.Replay({"export": path})
+            rep.feed(capture())
+            writer = rep.core.export
+            rep.core.start()
+            self.assertTrue(writer.file.closed)
+            rep.core.close_export()
+
+
+class TestCalendar(unittest.TestCase):
+    """Calendar values of transactions and weekday check."""
+
+    def transactions(self, packets, options=None):
+        """Return transaction records of the decoded packets."""
+        rep = replay.Replay(options)
+        rep.feed(packets)
+        rep.finish()
+        return outputs_python(rep, "WRITE") + outputs_python(rep, "READ")
+
+    def test_epoch(self):
+        """Datetime is converted to Unix time and day of the year."""
+        moment = datetime.datetime(2019, 3, 9, 23, 59, 58)
+        xfer = self.transactions(
+            replay.Bus().write(SLAVE, 0, bench.time_regs(moment)))[0]
+        epoch = moment.replace(tzinfo=datetime.timezone.utc).timestamp()
+        self.assertEqual(xfer.epoch, epoch)
+        self.assertEqual(xfer.yday, 68)
+        self.assertEqual(xfer.datetime, (2019, 3, 9, 23, 59, 58, 5))
+
+    def test_epoch_unknown(self):
+        """Unknown or invalid datetime has both values -1."""
+        bus = replay.Bus()
+        packets = bus.write(SLAVE, 0, [0x58, 0x59, 0x23])
+        packets += bus.write(SLAVE, 0x04, [0x31, 0x02, 0x19])
+        packets += bus.write(SLAVE, 0x04, [0x28])
+        records = self.transactions(packets)
+        self.assertEqual([(xfer.epoch, xfer.yday) for xfer in records[:2]],
+                         [(-1, -1)] * 2)
+        self.assertEqual(records[2].yday, 59)
+
+    def test_weekday(self):
+        """Weekday is checked against the date from the starting weekday."""
+        moment = datetime.datetime(2019, 3, 9, 23, 59, 58)
+        regs = bench.time_regs(moment)
+        for weekday, warnings in ((7, []), (6, [
+                "Warnings: weekday Friday instead of Saturday"])):
+            regs[3] = weekday
+            texts = [annots[0] for ss, es, ann, annots in annotations(
+                {"start_weekday": "Sunday"},
+                replay.Bus().write(SLAVE, 0, regs))
+                if annots[0].startswith("Warnings")]
+            self.assertEqual(texts, warnings)
+
+
+class TestDevices(unittest.TestCase):
+    """Independent decoding of more devices."""
+
+    def test_initial_device(self):
+        """Device decoded for the first time starts with empty state."""
+        rep = replay.Replay({"addresses": "0x68,0x6f", "history": "yes"})
+        self.assertEqual(rep.core.initial_device(), rep.core.save_device())
+        bus = replay.Bus()
+        rep.feed(bus.write(0x68, 0x08, [0x11, 0x22, 0x33]))
+        rep.feed(bus.read(0x6f, 0x10, [0x44]))
+        rep.finish()
+        self.assertEqual(rep.core.addr, 0x6f)
+        self.assertEqual(rep.core.shadow_snapshot(),
+                         (bytes(0x10) + b"\x44" + bytes(0x2f), 1 << 0x10))
+        self.assertEqual(len(rep.core.shadow_history), 1)
+        first = dict(zip(replay.load_decoder().core.device_variables,
+                         rep.core.devices[0x68]))
+        self.assertEqual(first["shadow"][0x08:0x0b], b"\x11\x22\x33")
+
+    def test_drift_end(self):
+        """Pending drift of every device is output at the end."""
+        rep = replay.Replay({"addresses": "0x68,0x69", "drift": "yes"},
+                            samplerate=bench.SAMPLERATE)
+        bus = replay.Bus(bench.BIT_SAMPLES)
+        rep.feed(drift_polls(bus, (0x68, 0x69), 0, 90,
+                             datetime.datetime(2019, 3, 9, 12)))
+        rep.finish()
+        drifts = outputs_python(rep, "DRIFT")
+        for addr in (0x68, 0x69):
+            rollovers = [drift["rollovers"] for drift in drifts
+                         if drift["addr"] == addr]
+            self.assertEqual(rollovers, [60, 89])
+
+    def test_changes_devices(self):
+        """Identical reads are folded per device polled in turn."""
+        bus = replay.Bus()
+        packets = []
+        for _ in range(4):
+            for addr in (0x68, 0x69):
+                packets += bus.read(addr, 0x08, [addr])
+        texts = [annots[0] for ss, es, ann, annots in
+                 annotations({"addresses": "68,69", "changes": "yes"},
+                             packets)
+                 if "identical" in annots[0]]
+        self.assertEqual(texts, ["Read: [0x68] 3 identical",
+                                 "Read: [0x69] 3 identical"])
+
+    def test_resume(self):
+        """Decoding of more devices resumed from a snapshot is identical."""
+        options = {"addresses": "0x68,0x50", "history": "yes"}
+        bus = replay.Bus()
+        moment = datetime.datetime(2019, 3, 9, 23, 59, 58)
+        first = bus.write(0x50, 0x08, [0x11, 0x22])
+        first += bus.read(0x68, 0, bench.time_regs(moment))
+        first += bus.read(0x50, 0x08, [0x11, 0x22])
+        second = bus.read(0x50, 0x08, [0x33])
+        second += bus.read(0x68, 0, bench.time_regs(moment))
+        rep = replay.Replay(options)
+        rep.feed(first)
+        state = json.loads(json.dumps(rep.core.snapshot_state()))
+        rep.feed(second)
+        rep.finish()
+        resumed = replay.Replay(options)
+        resumed.core.restore_state(state)
+        resumed.feed(second)
+        resumed.finish()
+        tail = len(resumed.annotations())
+        self.assertEqual(resumed.annotations(), rep.annotations()[-tail:])
+        self.assertEqual(resumed.core.devices, rep.core.devices)
+
+
+class TestDrift(unittest.TestCase):
+    """Estimation of RTC drift against the sample clock."""
+
+    def drifts(self, *captures):
+        """Return drift outputs of the decoded captures of packets."""
+        rep = replay.Replay({"drift": "yes"}, samplerate=bench.SAMPLERATE)
+        for packets in captures:
+            rep.feed(packets)
+        rep.finish()
+        return outputs_python(rep, "DRIFT")
+
+    def test_ppm(self):
+        """Drift of fast and slow RTC is estimated in ppm."""
+        for ppm in (5000, -5000):
+            bus = replay.Bus(bench.BIT_SAMPLES)
+            drifts = self.drifts(drift_polls(
+                bus, (SLAVE,), ppm, 300, datetime.datetime(2019, 3, 9, 12)))
+            self.assertAlmostEqual(drifts[-1]["ppm"], ppm, delta=20)
+
+    def test_midnight(self):
+        """RTC time wrapped at midnight is unwrapped."""
+        bus = replay.Bus(bench.BIT_SAMPLES)
+        drifts = self.drifts(drift_polls(
+            bus, (SLAVE,), 5000, 300, datetime.datetime(2019, 3, 9, 23, 58)))
+        self.assertEqual(drifts[-1]["rollovers"], 301)
+        self.assertAlmostEqual(drifts[-1]["ppm"], 5000, delta=20)
+
+    def test_restart(self):
+        """Writing seconds register restarts the estimation."""
+        bus = replay.Bus(bench.BIT_SAMPLES)
+        start = datetime.datetime(2019, 3, 9, 12)
+        before = drift_polls(bus, (SLAVE,), 5000, 30, start)
+        write = bus.write(SLAVE, 0, [0x00])
+        after = drift_polls(bus, (SLAVE,), 5000, 300,
+                            start + datetime.timedelta(hours=1))
+        drifts = self.drifts(before, write, after)
+        self.assertIn(drifts[-1]["rollovers"], range(295, 302))
+        self.assertAlmostEqual(drifts[-1]["ppm"], 5000, delta=20)
+
+
+class TestSnapshot(unittest.TestCase):
+    """Decoding resumed from a snapshot of the state."""
+
+    def test_timing(self):
+        """Timing metrics resumed from a snapshot are identical."""
+        packets = capture()
+        half = len(packets) // 2
+        rep = replay.Replay({"timing": "yes"})
+        rep.feed(packets[:half])
+        state = json.loads(json.dumps(rep.core.snapshot_state()))
+        rep.feed(packets[half:])
+        rep.finish()
+        resumed = replay.Replay({"timing": "yes"})
+        resumed.core.restore_state(state)
+        resumed.feed(packets[half:])
+        resumed.finish()
+        self.assertEqual(resumed.outputs[-2:], rep.outputs[-2:])
+        self.assertEqual(rep.outputs[-1][3][0], "TIMING")
+
+
+class TestSquareWave(unittest.TestCase):
+    """Verification of the square wave output by its rising edges."""
+
+    def decode(self, freq):
+        """Return annotation texts of edges against the rate of 4096 Hz."""
+        packets = replay.Bus(bench.BIT_SAMPLES).write(SLAVE, 0x07, [0x11])
+        edges = [1000 + round(i * bench.SAMPLERATE / freq)
+                 for i in range(int(freq * 1.5))]
+        rep = replay.Replay(samplerate=bench.SAMPLERATE)
+        rep.feed(packets, edges)
+        rep.finish()
+        return [annots[0] for ss, es, ann, annots in rep.annotations()]
+
+    def test_rate(self):
+        """Square wave of the programmed rate is not warned about."""
+        texts = self.decode(4096)
+        self.assertTrue([text for text in texts
+                         if text.startswith("Square wave: 4096.0 Hz")])
+        self.assertFalse([text for text in texts
+                          if text.startswith("Warnings")])
+
+    def test_mismatch(self):
+        """Square wave of other than programmed rate is warned about."""
+        texts = self.decode(4000)
+        self.assertIn("Warnings: square wave 4000.0 Hz instead of 4096 Hz",
+                      texts)
+
+
+class TestStatistics(unittest.TestCase):
+    """Counting of decoding statistics."""
+
+    def test_partial(self):
+        """Abandoned and unfinished transactions are counted as partial."""
+        bus = replay.Bus()
+        packets = bus.condition("START")
+        packets += bus.byte("ADDRESS WRITE", SLAVE)
+        packets += bus.condition("START REPEAT")
+        packets += bus.byte("ADDRESS WRITE", SLAVE)
+        packets += bus.byte("DATA WRITE", 0x08)
+        packets += bus.read(SLAVE, 0x08, [0x01])
+        packets += bus.write(SLAVE, None)
+        packets += bus.condition("START")
+        packets += bus.byte("ADDRESS READ", SLAVE)
+        rep = replay.Replay({"stats": "yes"})
+        rep.feed(packets)
+        rep.finish()
+        stats = outputs_python(rep, "STATS")[0]
+        self.assertEqual(stats["partial"], 3)
+        self.assertNotIn(None, stats["rows"])
+        self.assertEqual(stats["rows"]["other"], 1)
+        json.dumps(stats)
+
+
+if __name__ == "__main__":
+    unittest.main()